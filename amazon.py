@@ -1,165 +1,152 @@
 # Filename: real_time_amazon.py
 
 import asyncio
-import random
-import re
 from datetime import datetime
-from playwright.async_api import async_playwright
-from database.mongo_handler import upsert_product, ensure_indexes
+from config.settings import SEARCH_URL, RESOURCE_BLOCKING
+from database.mongo_handler import BulkProductWriter, product_collection
+from database.async_mongo import clear_stale_ranks, ensure_indexes, close_connection
+from scraper.browser_pool import browser_pool
+from scraper.interception import install_resource_blocking
+from scraper.extractors import extract_cards
+from scraper.parsers import SEARCH_CARD_FIELDS
+from scraper.page_load import load_results_page
+from scraper.taxonomy import tag_classifier
+from utils.timing import timed, count
+from scraper.utils import parse_price, parse_rating, parse_review_count, absolute_url, guess_brand
+
+# Same card fields as the main scraper, with wider rating/review fallbacks and a brand line.
+CARD_FIELDS = {
+    **SEARCH_CARD_FIELDS,
+    "rating": {"selectors": ["span.a-icon-alt"], "pattern": r"[\d.]+"},
+    "reviews": {
+        "selectors": [
+            "span[aria-label][class*='a-size-base']",
+            "span.a-size-small span[aria-label]",
+            "span[data-hook='total-review-count']",
+        ],
+        "pattern": r"[\d,]+",
+    },
+    "brand": {"selectors": ["span.a-size-base-plus.a-color-secondary, span.a-text-normal"]},
+}
 
 # ---------- Helper: classify tags ----------
 def classify_tags(category: str, title: str) -> list:
     """
-    Always returns the admin-entered category as tag.
+    The admin-entered category first, then any other taxonomy tags for the title.
     """
-    return [category.lower()]
+    tags = tag_classifier.classify(title, category)
+    return [category.lower(), *(t for t in tags if t != category.lower())]
 
 # ---------------- Scraper Function ----------------
-async def scrape_amazon(category="mobile", collection_name="scraped_products", max_products=5):
+async def scrape_amazon(category="mobile", collection_name="scraped_products", max_products=5, writer=None,
+                        on_product=None):
     """
     Scrape Amazon search results for a given category and save products in MongoDB.
+    Pass a shared BulkProductWriter as `writer` to batch writes across
+    scrapes; otherwise a private writer is flushed before returning.
+    `on_product(doc)` is called for every product as soon as it is queued.
+    With UNIFIED_PRODUCTS the products go to the canonical collection instead
+    of `collection_name`, with `category` as a membership.
     """
-    ensure_indexes(collection_name)  # ensure unique index on ASIN
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context()
-        page = await context.new_page()
-        url = f"https://www.amazon.in/s?k={category}"
-
-        print(f"[{datetime.now()}] 🔎 Scraping category: {category}")
-        await page.goto(url, timeout=60000)
-        await page.wait_for_timeout(3000)
-
-        # Selector for search result items
-        selector = "div.s-main-slot div[data-component-type='s-search-result']"
-        try:
-            await page.wait_for_selector(selector, timeout=10000)
-        except:
-            await browser.close()
-            print("Selector not found. Amazon might be blocking requests.")
-            return 0
-
-        products = await page.query_selector_all(selector)
-        scraped_count = 0
-
-        for product in products:
-            if scraped_count >= max_products:
-                break
-            try:
-                asin = await product.get_attribute("data-asin")
-                if not asin:
-                    continue
-
-                # TITLE
-                title_el = await product.query_selector("h2 span")
-                title = (await title_el.inner_text()).strip() if title_el else None
-                if not title:
-                    continue
-
-                # PRICE
-                price = None
-                price_el = await product.query_selector("span.a-price > span.a-offscreen")
-                if price_el:
-                    price_text = (await price_el.inner_text()).replace("₹", "").replace(",", "").strip()
-                    try:
-                        price = float(price_text)
-                    except:
-                        price = None
-
-                # BRAND
-                brand = "Unknown"
-                brand_el = await product.query_selector(
-                    "span.a-size-base-plus.a-color-secondary, span.a-text-normal"
-                )
-                if brand_el:
-                    brand_text = (await brand_el.inner_text()).strip()
-                    if brand_text:
-                        brand = brand_text
-                else:
-                    brand = title.split()[0]
-
-                # RATING
-                rating = 0.0
-                rating_selectors = [
-                    "span.a-icon-alt",
-                    
-                
-                ]
-                for sel in rating_selectors:
-                    try:
-                        rating_el = await product.query_selector(sel)
-                        if rating_el:
-                            text = await rating_el.inner_text()
-                            m = re.search(r"[\d.]+", text)
-                            if m:
-                                rating = float(m.group(0))
-                                break
-                    except:
+    collection_name = product_collection(collection_name)
+    await ensure_indexes(collection_name, [category])  # unique ASIN + listing indexes, incl. this category's ranks
+    await tag_classifier.refresh()
+    own_writer = writer is None
+    writer = writer or BulkProductWriter()
+
+    url = SEARCH_URL.format(query=category)
+
+    try:
+        # Leases a tab from a healthy identity's context (CircuitOpen when every identity is blocked)
+        async with browser_pool.page(url) as page:
+            block_stats = await install_resource_blocking(page, category) if RESOURCE_BLOCKING else None
+
+            print(f"[{datetime.now()}] 🔎 Scraping category: {category}")
+            # Selector for search result items (raises when throttled, blocked or it never appears)
+            selector = "div.s-main-slot div[data-component-type='s-search-result']"
+            await load_results_page(page, url, [selector], category, timeout=10)
+
+            with timed("extraction"):
+                records = await extract_cards(page, selector, CARD_FIELDS)
+            if block_stats:
+                print(f"🧹 Request filter: {block_stats.summary()}")
+            scraped_count = 0
+            asins = []
+
+            for record in records:
+                if scraped_count >= max_products:
+                    break
+                try:
+                    asin = record["asin"]
+                    if not asin:
+                        count("products_skipped")
                         continue
 
-                # REVIEWS
-                reviews = 0
-                review_selectors = [
-                    "span[aria-label][class*='a-size-base']",
-                    "span.a-size-small span[aria-label]",
-                    "span[data-hook='total-review-count']"
-                ]
-                for sel in review_selectors:
-                    try:
-                        review_el = await product.query_selector(sel)
-                        if review_el:
-                            text = await review_el.inner_text()
-                            m = re.search(r"[\d,]+", text)
-                            if m:
-                                reviews = int(m.group(0).replace(",", ""))
-                                break
-                    except:
+                    # TITLE
+                    title = (record["title"] or "").strip() or None
+                    if not title:
+                        count("products_skipped")
                         continue
 
-                # IMAGE
-                image_el = await product.query_selector("img.s-image")
-                image_url = await image_el.get_attribute("src") if image_el else None
-
-                # PRODUCT URL
-                link_el = await product.query_selector("h2 a")
-                product_url = None
-                if link_el:
-                    href = await link_el.get_attribute("href")
-                    if href:
-                        product_url = "https://www.amazon.in" + href.split("?")[0]
-
-                # TAGS
-                tags = classify_tags(category, title)
-
-                # Document
-                product_doc = {
-                    "asin": asin,
-                    "title": title,
-                    "price": price,
-                    "brand": brand,
-                    "rating": rating,
-                    "reviews": reviews,
-                    "image_url": image_url,
-                    "product_url": product_url,
-                    "category": category,
-                    "tags": tags,
-                    "scraped_at": datetime.now()
-                }
-
-                # Upsert into MongoDB
-                upsert_product(product_doc, collection_name)
-                scraped_count += 1
-                print(f"🛒 [{scraped_count}/{max_products}] {title[:60]} | ₹{price if price else 'N/A'} | {brand} | ⭐{rating} | Reviews: {reviews}")
-
-                await asyncio.sleep(random.uniform(2, 4))  # throttle requests
-
-            except Exception as e:
-                print(f"⚠️ Error parsing product: {e}")
-
-        await browser.close()
-        print(f"[{datetime.now()}] ✅ Completed scraping {scraped_count} products for category '{category}'\n")
-        return scraped_count
+                    # PRICE
+                    price = parse_price(record["price"])
+
+                    # BRAND
+                    if record["brand"] is None:
+                        brand = guess_brand(title)
+                    else:
+                        brand = record["brand"].strip() or "Unknown"
+
+                    # RATING / REVIEWS
+                    rating = parse_rating(record["rating"]) or 0.0
+                    reviews = parse_review_count(record["reviews"]) or 0
+
+                    # IMAGE / PRODUCT URL
+                    image_url = record["image_url"]
+                    product_url = absolute_url(record["product_url"])
+
+                    # TAGS
+                    tags = classify_tags(category, title)
+
+                    # Document
+                    product_doc = {
+                        "asin": asin,
+                        "title": title,
+                        "price": price,
+                        "brand": brand,
+                        "rating": rating,
+                        "reviews": reviews,
+                        "image_url": image_url,
+                        "product_url": product_url,
+                        "category": category,
+                        "rank": scraped_count + 1,
+                        "tags": tags,
+                        "scraped_at": datetime.now()
+                    }
+
+                    # Upsert into MongoDB
+                    await writer.aadd(product_doc, collection_name)
+                    scraped_count += 1
+                    asins.append(asin)
+                    count("products_scraped")
+                    if on_product:
+                        on_product(product_doc)
+                    print(f"🛒 [{scraped_count}/{max_products}] {title[:60]} | ₹{price if price else 'N/A'} | {brand} | ⭐{rating} | Reviews: {reviews}")
+
+                except Exception as e:
+                    count("products_failed")
+                    print(f"⚠️ Error parsing product: {e}")
+
+            if scraped_count:
+                # Only the first results page is read, so only the positions it covered can be stale
+                cleared = await clear_stale_ranks(collection_name, category, asins, scraped_count)
+                if cleared:
+                    print(f"🧹 Cleared '{category}' rank from {cleared} products no longer listed")
+    finally:
+        if own_writer:
+            await writer.aclose()   # also on failure/cancel: flushes what was queued and stops its timer
+    print(f"[{datetime.now()}] ✅ Completed scraping {scraped_count} products for category '{category}'\n")
+    return scraped_count
 
 # ---------------- Admin Menu ----------------
 async def admin_menu():
@@ -168,14 +155,20 @@ async def admin_menu():
         category = input("Enter category to scrape (or 'exit' to quit): ").strip()
         if category.lower() == "exit":
             print("Exiting scraper.")
+            await browser_pool.close()
+            await close_connection()
             break
         if category:
-            ensure_indexes("scraped_products")
-            scraped_count = await scrape_amazon(
-                category=category,
-                collection_name="scraped_products",
-                max_products=5
-            )
+            await ensure_indexes(product_collection("scraped_products"))
+            try:
+                scraped_count = await scrape_amazon(
+                    category=category,
+                    collection_name="scraped_products",
+                    max_products=5
+                )
+            except Exception as e:
+                print(f"❌ Scrape failed for category '{category}': {e}\n")
+                continue
             print(f"✅ Scraped {scraped_count} products for category '{category}'\n")
 
 # ---------------- Main ----------------
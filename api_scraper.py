@@ -1,33 +1,72 @@
-import asyncio
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
 import uvicorn
+from backend.ops_api import router as ops_router, scrape_jobs_router, submit_job
 from scraper.amazon_scraper import scrape_amazon
+from scraper.browser_pool import browser_pool
+from scraper.circuit_breaker import CircuitOpen
+from database.async_mongo import close_connection
+from database.mongo_handler import product_collection
+from scraper.result_cache import ResultCache
+from scraper.scrape_jobs import ScrapeJobRegistry
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await browser_pool.close()  # shut down warm browsers with the server
+    await close_connection()
+
+app = FastAPI(lifespan=lifespan)
+scrape_cache = ResultCache("api_scraper")
+scrape_jobs = ScrapeJobRegistry()
 
 @app.get("/scrape/{category}")
-async def scrape_category(category: str):
+async def scrape_category(category: str, max_age: float = 0):
+    """`max_age` (seconds): accept a cached result this old instead of scraping again."""
     print(f"\n🔔 Admin requested scraping for category: {category}")
 
     # Use same naming logic as scheduler
     collection_name = f"{category.lower()}_collection"
 
-    print(f"📌 Saving into MongoDB collection: {collection_name}")
+    print(f"📌 Saving into MongoDB collection: {product_collection(collection_name)}")
 
-    scraped = await scrape_amazon(
-        query=category,
-        collection_name=collection_name,
-        max_products=5
-    )
+    max_products = 5
+    try:
+        scraped, cache = await scrape_cache.get_or_run(
+            (category.lower(), max_products),
+            lambda: scrape_amazon(query=category, collection_name=collection_name, max_products=max_products),
+            max_age=max_age,
+        )
+    except CircuitOpen as e:
+        # Amazon is blocking us: tell the caller when to come back instead of piling on
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_in) + 1)})
 
     return {
         "status": "success",
         "category": category,
-        "collection": collection_name,
-        "scraped": scraped
+        "collection": product_collection(collection_name),
+        "scraped": scraped,
+        "cache": cache,
     }
 
 
+# ---------------- Scrape jobs, cache stats and scraper state ----------------
+def _scrape_job(category: str, max_products: int, on_product):
+    return scrape_amazon(query=category, collection_name=f"{category.lower()}_collection",
+                         max_products=max_products, on_product=on_product)
+
+
+app.include_router(scrape_jobs_router(scrape_jobs, scrape_cache, _scrape_job, prefix="/jobs"))
+app.include_router(ops_router)
+
+
+@app.post("/jobs/scrape/{category}", status_code=202)
+async def submit_category_job(category: str, max_products: int = 5):
+    """Start a scrape in the background and return its job id right away (same as POST /jobs)."""
+    return submit_job(scrape_jobs, _scrape_job, category, max_products, "/jobs")
+
+
 if __name__ == "__main__":
     print("🚀 API Scraper Server running at http://127.0.0.1:9000")
     uvicorn.run(app, host="127.0.0.1", port=9000)
@@ -1,11 +1,28 @@
 # app.py
-import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from amazon import scrape_amazon  # your existing Playwright scraper
+from backend.ops_api import router as ops_router, scrape_jobs_router
+from backend.products_api import router as products_router
+from scraper.browser_pool import browser_pool
+from scraper.circuit_breaker import CircuitOpen
+from database.async_mongo import close_connection
+from scraper.result_cache import ResultCache
+from scraper.scrape_jobs import ScrapeJobRegistry
 
-app = FastAPI()
+
+# ---------------- Lifespan ----------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await browser_pool.close()  # shut down warm browsers with the server
+    await close_connection()
+
+app = FastAPI(lifespan=lifespan)
+scrape_cache = ResultCache("app")
+scrape_jobs = ScrapeJobRegistry()
 
 # ---------------- CORS ----------------
 app.add_middleware(
@@ -16,21 +33,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------------- Product read API ----------------
+app.include_router(products_router)
+
 # ---------------- Request Schema ----------------
 class ScrapeRequest(BaseModel):
     category: str
     max_products: int = 5
+    max_age: float = 0   # seconds; accept a cached result this old instead of scraping again
 
 # ---------------- Endpoint to trigger scraping ----------------
 @app.post("/scrape-products")
 async def scrape_products(req: ScrapeRequest):
     try:
-        # Run your existing Playwright scraper
-        scraped = await scrape_amazon(category=req.category, max_products=req.max_products)
-        return {"status": "success", "scraped": scraped, "category": req.category}
+        # Run your existing Playwright scraper (identical concurrent requests share one run)
+        scraped, cache = await scrape_cache.get_or_run(
+            (req.category.lower(), req.max_products),
+            lambda: scrape_amazon(category=req.category, max_products=req.max_products),
+            max_age=req.max_age,
+        )
+        return {"status": "success", "scraped": scraped, "category": req.category, "cache": cache}
+    except CircuitOpen as e:
+        return {"status": "deferred", "message": str(e), "retry_after": int(e.retry_in) + 1}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+# ---------------- Scrape jobs, cache stats and scraper state ----------------
+app.include_router(scrape_jobs_router(
+    scrape_jobs, scrape_cache,
+    lambda category, max_products, on_product: scrape_amazon(category=category, max_products=max_products,
+                                                             on_product=on_product),
+    prefix="/scrape-jobs",
+))
+app.include_router(ops_router)
+
 # ---------------- Run server ----------------
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,101 @@
+# backend/ops_api.py
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from scraper.circuit_breaker import circuit_breaker
+from scraper.identities import identity_pool
+from scraper.result_cache import ResultCache
+from scraper.scrape_jobs import ScrapeJobRegistry
+from scraper.taxonomy import tag_classifier
+from utils.metrics import metrics_payload
+
+# Endpoints both scraper apps (app.py, api_scraper.py) serve. `router` is the
+# process-wide state (circuits, identities, taxonomy, metrics); each app adds a
+# scrape_jobs_router() over its own job registry, result cache and scraper.
+router = APIRouter(tags=["ops"])
+
+
+# ---------- Scraper state ----------
+@router.get("/circuit")
+def circuit_state():
+    """Circuit breaker state per (host, identity)."""
+    return circuit_breaker.snapshot()
+
+
+@router.get("/identities")
+def identity_state():
+    """Health, use counts and rest state of each browser identity."""
+    return identity_pool.snapshot()
+
+
+@router.get("/taxonomy")
+def taxonomy_state():
+    return tag_classifier.snapshot()
+
+
+@router.post("/taxonomy/reload")
+async def reload_taxonomy():
+    """Re-read the tag taxonomy from its source (config or Mongo) without a restart."""
+    changed = await tag_classifier.reload()
+    return {"changed": changed, **tag_classifier.snapshot()}
+
+
+@router.get("/metrics")
+def metrics():
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
+
+
+# ---------- Scrape jobs ----------
+class ScrapeJobRequest(BaseModel):
+    category: str
+    max_products: int = 5
+
+
+def submit_job(jobs: ScrapeJobRegistry, scrape, category: str, max_products: int, prefix: str) -> dict:
+    """Start `scrape(category, max_products, on_product)` in the background and describe the job."""
+    job = jobs.submit(category, max_products, lambda on_product: scrape(category, max_products, on_product))
+    print(f"\n🔔 Queued scrape job {job.id} for category: {category}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"{prefix}/{job.id}",
+        "events_url": f"{prefix}/{job.id}/events",
+    }
+
+
+def scrape_jobs_router(jobs: ScrapeJobRegistry, cache: ResultCache, scrape, prefix: str) -> APIRouter:
+    """
+    Submit/status/events endpoints under `prefix` for one app's job registry,
+    plus /cache/stats for its result cache. `scrape(category, max_products,
+    on_product)` returns the coroutine that runs one scrape.
+    """
+    jobs_router = APIRouter(tags=["scrape jobs"])
+
+    def job_or_404(job_id: str):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job id")
+        return job
+
+    @jobs_router.post(prefix, status_code=202)
+    async def submit_scrape_job(req: ScrapeJobRequest):
+        """Returns a job id immediately; poll the status_url or stream the events_url."""
+        return submit_job(jobs, scrape, req.category, req.max_products, prefix)
+
+    @jobs_router.get(prefix + "/{job_id}")
+    def scrape_job_status(job_id: str, include_products: bool = True):
+        return job_or_404(job_id).as_dict(include_products)
+
+    @jobs_router.get(prefix + "/{job_id}/events")
+    async def scrape_job_events(job_id: str):
+        """Per-product progress as Server-Sent Events (event: status | product | done | failed)."""
+        job = job_or_404(job_id)
+        return StreamingResponse(jobs.sse(job), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @jobs_router.get("/cache/stats")
+    def cache_stats():
+        return cache.snapshot()
+
+    return jobs_router
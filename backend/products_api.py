@@ -0,0 +1,222 @@
+# backend/products_api.py
+import base64
+import json
+import re
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from config.settings import (
+    HISTORY_COLLECTION,
+    QUEUE_COLLECTION,
+    TAXONOMY_COLLECTION,
+    PRODUCT_SORT_FIELDS,
+    PRODUCT_PAGE_SIZE,
+    PRODUCT_PAGE_MAX,
+    PRODUCT_DEFAULT_FIELDS,
+)
+from database.async_mongo import get_collection
+from database.mongo_handler import category_key
+from database.export import current_watermark, compressor, export_stream, file_extension, media_type
+from database.schedule_store import SCHEDULE_COLLECTION
+
+# Read side of the product collections, for the frontend and downstream jobs.
+# Listings use keyset pagination on (sort field, asin): the cursor carries the
+# last row's key, so page N costs the same as page 1 and rows written between
+# requests can't shift the page boundaries.
+router = APIRouter(prefix="/products", tags=["products"])
+
+NON_PRODUCT_COLLECTIONS = {HISTORY_COLLECTION, QUEUE_COLLECTION, TAXONOMY_COLLECTION, SCHEDULE_COLLECTION}
+COLLECTION_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+FIELD_RE = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+
+def _collection(name: str):
+    if not COLLECTION_RE.match(name) or name in NON_PRODUCT_COLLECTIONS or name.startswith("system"):
+        raise HTTPException(status_code=404, detail=f"No product collection '{name}'")
+    return get_collection(name)
+
+
+def _projection(fields: str | None) -> dict:
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else PRODUCT_DEFAULT_FIELDS
+    bad = [f for f in names if not FIELD_RE.match(f)]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Invalid field names: {bad}")
+    # `_id` is an ObjectId (not JSON) and always excluded; letting it through would override that
+    if any(f.split(".")[0] == "_id" for f in names):
+        raise HTTPException(status_code=400, detail="_id is not a selectable field")
+    return {"_id": 0, **{f: 1 for f in names}}
+
+
+def _value(doc: dict, path: str):
+    for part in path.split("."):
+        doc = doc.get(part) if isinstance(doc, dict) else None
+    return doc
+
+
+def _drop(doc: dict, path: str):
+    """Remove a (dotted) field, and its parent if that leaves it empty."""
+    head, _, rest = path.partition(".")
+    if rest and isinstance(doc.get(head), dict):
+        _drop(doc[head], rest)
+        if doc[head]:
+            return
+    doc.pop(head, None)
+
+
+# ---------- Cursors ----------
+def encode_cursor(value, asin: str) -> str:
+    raw = json.dumps([value, asin], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        value, asin = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, asin
+
+
+def _after(sort: str, direction: int, cursor: str) -> dict:
+    """
+    Rows strictly after the cursor in (sort, asin) order. Missing/null sort
+    values (price, rating, ranks on migrated products) sort before every value,
+    so they come first ascending and last descending; comparisons like $gt
+    never match null, so those rows need their own branch.
+    """
+    value, asin = decode_cursor(cursor)
+    op = "$gt" if direction == 1 else "$lt"
+    if value is None:
+        branches = [{sort: None, "asin": {op: asin}}]
+        if direction == 1:
+            branches.append({sort: {"$ne": None}})
+    else:
+        branches = [{sort: {op: value}}, {sort: value, "asin": {op: asin}}]
+        if direction == -1:
+            branches.append({sort: None})
+    return {"$or": branches}
+
+
+# ---------- Filters ----------
+def build_filter(tags: list[str] | None = None, match: str = "all", brand: str | None = None,
+                 min_price: float | None = None, max_price: float | None = None,
+                 min_rating: float | None = None, category: str | None = None) -> dict:
+    query = {}
+    if category:
+        query["categories"] = category_key(category)
+    if tags:
+        tags = [t.lower() for t in tags]
+        if len(tags) == 1:
+            query["tags"] = tags[0]   # plain equality lets the (tags, sort, asin) index bound the scan
+        else:
+            query["tags"] = {"$all" if match == "all" else "$in": tags}
+    if brand:
+        query["brand"] = brand
+    price = {}
+    if min_price is not None:
+        price["$gte"] = min_price
+    if max_price is not None:
+        price["$lte"] = max_price
+    if price:
+        query["price"] = price
+    if min_rating is not None:
+        query["rating"] = {"$gte": min_rating}
+    return query
+
+
+# ---------- Endpoints ----------
+@router.get("/{collection}")
+async def list_products(
+    collection: str,
+    category: str | None = Query(None, description="Category/query the product was scraped under"),
+    tags: list[str] | None = Query(None, description="Repeat for several tags"),
+    match: Literal["all", "any"] = "all",
+    brand: str | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    min_rating: float | None = Query(None, ge=0, le=5),
+    sort: str = PRODUCT_SORT_FIELDS[0],
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(PRODUCT_PAGE_SIZE, ge=1, le=PRODUCT_PAGE_MAX),
+    cursor: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated fields to return"),
+):
+    """
+    One page of products. Pass `next_cursor` from the previous response as
+    `cursor` (with the same filters and sort) to get the next page.
+    `sort=rank` (with `category`) lists products in their search-result order.
+    """
+    if sort == "rank" and category:
+        sort = f"ranks.{category_key(category)}"
+    elif sort not in PRODUCT_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {PRODUCT_SORT_FIELDS}, or rank with a category")
+    products = _collection(collection)
+    direction = 1 if order == "asc" else -1
+    projection = _projection(fields)
+    # The sort key and asin are needed to build the next cursor; fetch them if not asked for
+    extra = [f for f in (sort, "asin") if f.split(".")[0] not in projection and f not in projection]
+    projection.update({f: 1 for f in extra})
+
+    query = build_filter(tags, match, brand, min_price, max_price, min_rating, category)
+    if cursor:
+        query = {"$and": [query, _after(sort, direction, cursor)]} if query else _after(sort, direction, cursor)
+
+    rows = await products.find(query, projection).sort([(sort, direction), ("asin", direction)]) \
+        .limit(limit + 1).to_list(None)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(_value(rows[-1], sort), rows[-1]["asin"]) if has_more else None
+    for row in rows:
+        for field in extra:
+            _drop(row, field)
+
+    return {
+        "collection": collection,
+        "items": rows,
+        "count": len(rows),
+        "sort": sort,
+        "order": order,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/{collection}/export")
+async def export_products(
+    collection: str,
+    format: Literal["jsonl", "csv", "parquet"] = "jsonl",
+    fields: str | None = Query(None, description="Comma-separated fields to export"),
+    since: str | None = Query(None, description="Only products with last_updated after this watermark"),
+    compress: Literal["gzip", "zstd"] | None = None,
+):
+    """
+    Stream the collection as a download. The X-Export-Watermark header is the
+    newest last_updated included (held EXPORT_WATERMARK_LAG seconds behind now
+    so writes still landing aren't skipped); pass it as `since` for the next
+    incremental export.
+    """
+    _collection(collection)
+    projection = _projection(fields)
+    try:
+        compressor(compress)
+        if format == "parquet":
+            import pyarrow  # noqa: F401  (fail before the response starts, not halfway through it)
+    except (ImportError, RuntimeError) as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    until = await current_watermark(collection)
+    filename = f"{collection}.{file_extension(format, compress)}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "X-Export-Watermark": until or since or ""}
+    print(f"📤 Exporting '{collection}' as {filename} (since={since}, watermark={until})")
+    return StreamingResponse(
+        export_stream(collection, format, [f for f in projection if f != "_id"], since, until, compress),
+        media_type=media_type(format, compress),
+        headers=headers,
+    )
+
+
+@router.get("/{collection}/{asin}")
+async def get_product(collection: str, asin: str, fields: str | None = None):
+    product = await _collection(collection).find_one({"asin": asin}, _projection(fields) if fields else {"_id": 0})
+    if product is None:
+        raise HTTPException(status_code=404, detail=f"No product {asin} in '{collection}'")
+    return product
@@ -3,7 +3,9 @@ from fastapi import FastAPI, HTTPException, Depends
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 import asyncio
-from scraper.amazon_scraper import scrape_amazon
+from scraper.orchestrator import scrape_categories
+from scraper.browser_pool import browser_pool
+from database.async_mongo import close_connection
 from config.settings import CATEGORIES
 
 app = FastAPI()
@@ -13,8 +15,11 @@ scheduler.start()
 
 async def scrape_all():
     print(f"[{datetime.now()}] Starting scheduled scrape...")
-    for query, collection in CATEGORIES.items():
-        await scrape_amazon(query, collection_name=collection, max_pages=5)
+    try:
+        await scrape_categories(CATEGORIES, max_products=None, max_pages=5)
+    finally:
+        await browser_pool.close()  # browsers are bound to this asyncio.run loop
+        await close_connection()   # so is the async Mongo client
     print("All scraping tasks completed!")
 
 def start_scraper_job():
@@ -0,0 +1,100 @@
+# benchmarks/memory_mongo.py
+
+import mongomock
+from pymongo import UpdateOne
+
+
+class _BulkResult:
+    def __init__(self, upserted_count: int, modified_count: int):
+        self.upserted_count = upserted_count
+        self.modified_count = modified_count
+
+
+class MemoryCollection:
+    """mongomock collection whose bulk_write accepts the UpdateOne ops this repo sends."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def bulk_write(self, ops, ordered=True):
+        upserted = modified = 0
+        for op in ops:
+            if not isinstance(op, UpdateOne):
+                raise TypeError(f"Unsupported bulk op: {type(op).__name__}")
+            result = self._collection.update_one(op._filter, op._doc, upsert=op._upsert)
+            modified += result.modified_count
+            upserted += 1 if result.upserted_id is not None else 0
+        return _BulkResult(upserted, modified)
+
+
+class MemoryDatabase:
+    """In-memory stand-in for a pymongo Database (only what the scraper touches)."""
+
+    def __init__(self, name: str = "amazon_scraper_bench"):
+        self._db = mongomock.MongoClient()[name]
+
+    def __getitem__(self, name):
+        return MemoryCollection(self._db[name])
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+    def create_collection(self, name, **kwargs):
+        kwargs.pop("timeseries", None)   # mongomock has no time-series collections
+        return self._db.create_collection(name, **kwargs)
+
+
+class AsyncMemoryCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    async def __aiter__(self):
+        for doc in self._cursor:
+            yield doc
+
+
+class AsyncMemoryCollection:
+    """Awaitable facade over MemoryCollection, shaped like pymongo's AsyncCollection."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncMemoryCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return attr(*args, **kwargs)
+        return call
+
+
+class AsyncMemoryDatabase:
+    """Async view of a MemoryDatabase for database/async_mongo.py (same data as the sync view)."""
+
+    def __init__(self, database: MemoryDatabase):
+        self._database = database
+
+    def __getitem__(self, name):
+        return AsyncMemoryCollection(self._database[name])
+
+    async def create_collection(self, name, **kwargs):
+        return self._database.create_collection(name, **kwargs)
@@ -0,0 +1,221 @@
+# benchmarks/run_benchmark.py
+"""
+Offline throughput benchmark.
+
+Serves the recorded SERP fixtures from a local HTTP server, points
+config.settings.SEARCH_URL at it, stores products in an in-memory (or local)
+Mongo and drives scrape_amazon, main.run_scrape and the FastAPI endpoints.
+Reports products/sec, p50/p95 latency per target and per phase, and peak RSS.
+
+    python -m benchmarks.run_benchmark --target all --concurrency 4 --iterations 3
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import threading
+import time
+import psutil
+import config.settings as settings
+from utils import timing
+from benchmarks.serp_server import start_server
+
+QUERIES = ["mobile", "laptop", "sofa", "shirt", "toys"]
+
+
+# ---------- Peak memory ----------
+class PeakRSS:
+    """Samples RSS of this process and all children (Chromium, Playwright driver) in a thread."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_self = 0
+        self.peak_total = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        me = psutil.Process()
+        while not self._stop.is_set():
+            own = me.memory_info().rss
+            total = own
+            for child in me.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    continue
+            self.peak_self = max(self.peak_self, own)
+            self.peak_total = max(self.peak_total, total)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# ---------- Setup ----------
+def configure(args, port: int):
+    """Patch settings before any scraper module is imported (they read settings at import time)."""
+    settings.SEARCH_URL = f"http://127.0.0.1:{port}/s?k={{query}}"
+    settings.DB_NAME = args.db_name
+    settings.SCRAPE_CONCURRENCY = args.concurrency
+    settings.DOMAIN_CONCURRENCY = args.concurrency
+    settings.BROWSER_POOL_SIZE = max(1, min(args.concurrency, 4))
+    if not args.polite:
+        settings.RATE_LIMIT_PER_HOST = settings.RATE_LIMIT_MAX = settings.RATE_LIMIT_BURST = 1000
+        settings.RATE_LIMIT_JITTER = 0
+
+
+def install_mongo(args):
+    if args.mongo != "memory":
+        return
+    import database.async_mongo as async_mongo
+    import database.mongo_handler as mongo_handler
+    from benchmarks.memory_mongo import AsyncMemoryDatabase, MemoryDatabase
+
+    memory = MemoryDatabase(args.db_name)
+    mongo_handler.db = memory
+    async_mongo.get_db = lambda: AsyncMemoryDatabase(memory)
+
+
+# ---------- Targets ----------
+async def _timed_call(name: str, coro):
+    started = time.perf_counter()
+    try:
+        return await coro
+    except Exception as e:
+        timing.count(f"{name}_errors")
+        print(f"❌ {name}: {e}")
+    finally:
+        timing.record(f"target:{name}", time.perf_counter() - started)
+
+
+async def bench_scrape(args):
+    from scraper.amazon_scraper import scrape_amazon
+
+    queries = itertools.cycle(QUERIES)
+    for _ in range(args.iterations):
+        batch = [next(queries) for _ in range(args.concurrency)]
+        await asyncio.gather(*(
+            _timed_call("scrape_amazon", scrape_amazon(
+                query=q, collection_name=f"bench_{q}", max_products=None, max_pages=args.pages))
+            for q in batch
+        ))
+
+
+async def bench_run_scrape(args):
+    from bson import ObjectId
+    import main
+    from database.schedule_store import schedule_collection
+
+    for _ in range(args.iterations):
+        schedule = {
+            "_id": ObjectId(),
+            "frequency": "benchmark",
+            "categories": {q: f"bench_{q}" for q in QUERIES},
+            "is_running": False,
+        }
+        await schedule_collection().insert_one(schedule)   # run_scrape claims it atomically
+        await _timed_call("run_scrape", main.run_scrape(schedule))
+
+
+async def bench_api(args):
+    import httpx
+    import api_scraper
+    import app as frontend_app
+
+    queries = itertools.cycle(QUERIES)
+    api_transport = httpx.ASGITransport(app=api_scraper.app)
+    app_transport = httpx.ASGITransport(app=frontend_app.app)
+    async with httpx.AsyncClient(transport=api_transport, base_url="http://bench", timeout=None) as api, \
+            httpx.AsyncClient(transport=app_transport, base_url="http://bench", timeout=None) as front:
+        for _ in range(args.iterations):
+            batch = [next(queries) for _ in range(args.concurrency)]
+            await asyncio.gather(
+                *(_timed_call("GET /scrape/{category}", api.get(f"/scrape/{q}")) for q in batch),
+                *(_timed_call("POST /scrape-products", front.post(
+                    "/scrape-products", json={"category": q, "max_products": 20})) for q in batch),
+            )
+
+
+TARGETS = {"scrape": bench_scrape, "run_scrape": bench_run_scrape, "api": bench_api}
+
+
+# ---------- Report ----------
+def report(args, results: dict, peak: PeakRSS) -> dict:
+    print(f"\n=== Benchmark | concurrency={args.concurrency} iterations={args.iterations} mongo={args.mongo} ===")
+    print(f"{'target':<26}{'products':>10}{'wall(s)':>10}{'products/s':>12}")
+    for name, r in results.items():
+        print(f"{name:<26}{r['products']:>10}{r['wall']:>10.2f}{r['products_per_sec']:>12.2f}")
+
+    summary = timing.summary()
+    print(f"\n{'phase':<26}{'count':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'max(ms)':>10}")
+    for phase, s in sorted(summary["phases"].items()):
+        print(f"{phase:<26}{s['count']:>8}{s['p50'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}{s['max'] * 1000:>10.1f}")
+
+    mb = 1024 * 1024
+    print(f"\nPeak RSS: python={peak.peak_self / mb:.0f} MB | with browsers={peak.peak_total / mb:.0f} MB")
+    print(f"Counters: {summary['counters']}")
+    return {
+        "config": vars(args),
+        "targets": results,
+        "phases": summary["phases"],
+        "counters": summary["counters"],
+        "peak_rss_mb": {"python": peak.peak_self / mb, "total": peak.peak_total / mb},
+    }
+
+
+async def run(args) -> dict:
+    from scraper.browser_pool import browser_pool
+
+    targets = list(TARGETS) if args.target == "all" else [args.target]
+    results = {}
+    with PeakRSS() as peak:
+        try:
+            for name in targets:
+                before = timing.summary()["counters"].get("products_scraped", 0)
+                started = time.perf_counter()
+                await TARGETS[name](args)
+                wall = time.perf_counter() - started
+                products = timing.summary()["counters"].get("products_scraped", 0) - before
+                results[name] = {"products": products, "wall": wall,
+                                 "products_per_sec": products / wall if wall else 0.0}
+        finally:
+            await browser_pool.close()
+    return report(args, results, peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper benchmark against recorded SERP fixtures")
+    parser.add_argument("--target", choices=["all", *TARGETS], default="all")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=2, help="result pages per scrape_amazon call")
+    parser.add_argument("--mongo", choices=["memory", "local"], default="memory",
+                        help="'local' uses MONGO_URI with --db-name")
+    parser.add_argument("--db-name", default="amazon_scraper_bench")
+    parser.add_argument("--latency-ms", type=float, default=0, help="added latency per fixture response")
+    parser.add_argument("--polite", action="store_true", help="keep the production rate limits")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    server = start_server(latency_ms=args.latency_ms)
+    configure(args, server.server_address[1])
+    install_mongo(args)
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"📝 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# benchmarks/serp_server.py
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "serp")
+DETAIL_FIXTURE = os.path.join(os.path.dirname(FIXTURES_DIR), "detail", "product.html")
+
+
+class SerpHandler(BaseHTTPRequestHandler):
+    """
+    Serves recorded SERP fixtures as a local stand-in for amazon.in.
+
+    /s?k=<query>&page=<n> returns fixtures/serp/<query>_p<n>.html, falling
+    back to the mobile pages for queries without their own fixture.
+    /s?k=captcha returns the CAPTCHA page.
+    /dp/<asin> returns the product detail fixture for any ASIN.
+    """
+
+    latency = 0.0   # seconds added to every response
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith("/dp/"):
+            self._send_file(DETAIL_FIXTURE)
+            return
+        if parsed.path != "/s":
+            self._send(404, b"not found")
+            return
+        params = parse_qs(parsed.query)
+        query = params.get("k", ["mobile"])[0].lower()
+        page = params.get("page", ["1"])[0]
+
+        if query == "captcha":
+            path = os.path.join(FIXTURES_DIR, "captcha.html")
+        else:
+            path = os.path.join(FIXTURES_DIR, f"{query}_p{page}.html")
+            if not os.path.exists(path):
+                path = os.path.join(FIXTURES_DIR, f"mobile_p{page}.html")
+        self._send_file(path)
+
+    def _send_file(self, path: str):
+        if not os.path.exists(path):
+            self._send(404, b"no such page")
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        with open(path, "rb") as f:
+            self._send(200, f.read(), "text/html; charset=utf-8")
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # keep benchmark output readable
+
+
+def start_server(port: int = 0, latency_ms: float = 0) -> ThreadingHTTPServer:
+    """Start the fixture server in a daemon thread; port 0 picks a free port."""
+    SerpHandler.latency = latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", port), SerpHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    server = start_server(9100)
+    print("🧪 Serving SERP fixtures at http://127.0.0.1:9100/s?k={query}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
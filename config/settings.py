@@ -13,3 +13,173 @@ CATEGORIES = {
     "shirt": "shirts",
     "toys": "toys",
 }
+# What a schedule with no admin-selected categories scrapes (query -> collection)
+SCHEDULE_DEFAULT_CATEGORIES = {
+    "mobiles": "mobiles_collection",
+    "laptops": "laptops_collection",
+    "shirts": "shirts_collection",
+    "toys": "toys_collection",
+    "sofas": "sofas_collection",
+}
+
+# ---------- Browser Pool ----------
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
+)
+BROWSER_ARGS = ["--no-sandbox", "--disable-blink-features=AutomationControlled"]
+BROWSER_POOL_SIZE = 2          # warm Chromium instances kept per process
+BROWSER_MAX_PAGES = 50         # recycle a browser after serving this many pages
+BROWSER_MAX_MEMORY_MB = 1500   # recycle when the Chromium process tree grows past this
+
+# ---------- Scrape Orchestrator ----------
+SCRAPE_CONCURRENCY = 3     # categories scraped in parallel per run
+DOMAIN_CONCURRENCY = 2     # simultaneous scrapes against one host, process-wide
+CATEGORY_TIMEOUT = 600     # seconds before a single category is abandoned
+
+# ---------- Bulk Writes ----------
+BULK_BATCH_SIZE = 100        # queued upserts per bulk_write
+BULK_FLUSH_INTERVAL = 5.0    # seconds before a partial batch is flushed anyway
+TOUCH_LAST_SEEN = False      # True: unchanged products still get a `last_seen` bump
+
+# ---------- Extraction ----------
+EXTRACTION_MODE = "evaluate"   # "evaluate" = one $$eval per page, "html" = parse page.content() offline, "handles" = per-field element handles
+
+# ---------- Request Interception ----------
+RESOURCE_BLOCKING = True
+BLOCK_RESOURCE_TYPES = ["image", "media", "font"]
+BLOCK_URL_PATTERNS = [            # regexes matched against third-party / tracking URLs
+    r"amazon-adsystem\.com",
+    r"doubleclick\.net",
+    r"google-analytics\.com",
+    r"googletagmanager\.com",
+    r"fls-[a-z]+\.amazon\.",
+    r"unagi(-[a-z]+)?\.amazon\.",
+    r"/uedata",
+    r"/rd/uedata",
+    r"/1/batch/",
+]
+# Per-query overrides: resource types / URL patterns that must still load
+RESOURCE_ALLOWLIST = {
+    # "sofa": {"types": ["image"], "patterns": [r"m\.media-amazon\.com"]},
+}
+# Rough transfer size of a blocked request, used to estimate bytes saved
+BLOCKED_BYTES_ESTIMATE = {"image": 40_000, "media": 400_000, "font": 35_000, "script": 50_000, "default": 5_000}
+
+# ---------- Rate Limiting ----------
+RATE_LIMIT_PER_HOST = 0.5        # page requests per second per host (token refill rate)
+RATE_LIMIT_BURST = 2             # tokens a quiet host can bank
+RATE_LIMIT_MIN = 0.05            # floor after repeated throttling (one request per 20s)
+RATE_LIMIT_MAX = 1.0             # ceiling reached after sustained success
+RATE_LIMIT_JITTER = 1.5          # extra random delay (seconds) per request
+RATE_LIMIT_RECOVERY_STREAK = 5   # successes in a row before speeding back up
+
+# ---------- Price History ----------
+HISTORY_ENABLED = True
+HISTORY_COLLECTION = "product_history"   # time-series: one point per price/rating/reviews change
+
+# ---------- Observability ----------
+TRACING_ENABLED = False   # emit OpenTelemetry spans per phase (needs opentelemetry-api + an SDK/exporter)
+
+# ---------- Job Queue ----------
+QUEUE_COLLECTION = "scrape_jobs"
+QUEUE_VISIBILITY_TIMEOUT = 900   # seconds a leased job stays invisible without a heartbeat
+QUEUE_MAX_ATTEMPTS = 3           # attempts before a job is marked failed
+QUEUE_RETRY_BASE = 60            # first retry delay (seconds), doubled per attempt
+QUEUE_RETRY_MAX = 3600           # cap on the retry delay
+QUEUE_POLL_INTERVAL = 5          # seconds an idle worker waits before polling again
+WORKER_CONCURRENCY = 1           # jobs one worker process runs at a time
+EMBEDDED_WORKER = True           # main.py also drains the queue (single-process deployments)
+
+# ---------- Scheduling ----------
+SCHEDULE_TICK = 60   # longest the scheduler sleeps between checks for new / edited schedules
+
+# ---------- Result Cache ----------
+SCRAPE_CACHE_TTL = 900            # seconds a finished on-demand scrape is kept (upper bound for max_age)
+SCRAPE_CACHE_MAX_ENTRIES = 256
+
+# ---------- Scrape Job API ----------
+JOB_API_CONCURRENCY = 4      # submitted scrape jobs running at once per server
+JOB_API_RETENTION = 200      # finished jobs kept for polling (oldest dropped first)
+SSE_KEEPALIVE = 15           # seconds between keep-alive comments on an idle event stream
+
+# ---------- Detail Enrichment ----------
+ENRICH_DETAILS = False       # also open /dp/{asin} pages for brand, availability, seller, features, rating breakdown
+DETAIL_TABS = 4              # detail pages fetched concurrently (tabs of one browser context)
+DETAIL_TTL = 7 * 24 * 3600   # seconds before an ASIN's detail data is fetched again
+
+# ---------- Page Readiness ----------
+READY_TIMEOUT = 30           # seconds to wait for results or a block marker before giving up
+DEBUG_CAPTURE = False        # save a screenshot + HTML of pages that weren't ready (slow; for debugging)
+DEBUG_CAPTURE_DIR = "debug"
+
+# ---------- Circuit Breaker ----------
+CIRCUIT_FAILURE_THRESHOLD = 3   # consecutive block signals (CAPTCHA, 429/503) before a host/identity opens
+CIRCUIT_BACKOFF_BASE = 120      # seconds the circuit stays open the first time
+CIRCUIT_BACKOFF_MAX = 6 * 3600  # cap for the doubling backoff after failed probes
+
+# ---------- Tag Taxonomy ----------
+# tag -> parents (labels added with it) and keywords matched as whole words in
+# the title and the search query. A keyword list weighs 1.0 per word; a dict
+# gives explicit weights (negative ones count against the tag).
+TAXONOMY = {
+    "mobile": {"parents": ["electronics"],
+               "keywords": {"mobile": 1, "mobiles": 1, "phone": 1, "phones": 1, "smartphone": 1, "smartphones": 1,
+                            "iphone": 1, "screen guard": -1, "tempered glass": -1}},
+    "laptop": {"parents": ["electronics"],
+               "keywords": {"laptop": 1, "laptops": 1, "notebook": 0.5, "macbook": 1, "chromebook": 1,
+                            "laptop stand": -0.5, "laptop bag": -0.5}},
+    "toys": {"parents": ["kids"], "keywords": {"toy": 1, "toys": 1, "puzzle": 0.5, "action figure": 1}},
+    "sofa": {"parents": ["furniture"], "keywords": {"sofa": 1, "sofas": 1, "couch": 1, "sofa cum bed": 1, "recliner": 0.5}},
+    "shirt": {"parents": ["fashion"], "keywords": {"shirt": 1, "shirts": 1, "tshirt": 1, "t shirt": 1, "top": 0.5, "tops": 0.5}},
+}
+TAXONOMY_SOURCE = "config"          # "config" = TAXONOMY above, "mongo" = one document per tag in TAXONOMY_COLLECTION
+TAXONOMY_COLLECTION = "taxonomy"
+TAXONOMY_RELOAD_INTERVAL = 300      # seconds between checks for an edited Mongo taxonomy
+TAXONOMY_QUERY_WEIGHT = 2.0         # keyword hits in the search query count this much more than title hits
+TAXONOMY_MIN_SCORE = 1.0            # score a tag needs to be assigned
+TAXONOMY_MAX_TAGS = 3               # tags per product (each followed by its parents)
+
+# ---------- Product Read API ----------
+PRODUCT_SORT_FIELDS = ["last_updated", "price", "rating", "reviews"]   # first one is the default sort
+PRODUCT_INDEX_PREFIXES = [None, "categories", "tags", "brand"]   # equality filters that get a (filter, sort field, asin) index per sort field
+PRODUCT_PAGE_SIZE = 24
+PRODUCT_PAGE_MAX = 200
+PRODUCT_DEFAULT_FIELDS = ["asin", "title", "price", "rating", "reviews", "image_url", "product_url", "tags", "brand", "last_updated",
+                          "categories", "ranks"]
+
+# ---------- Export ----------
+EXPORT_BATCH_SIZE = 1000     # documents per Mongo cursor batch / encoded chunk
+EXPORT_DIR = "exports"       # default output directory for export.py
+EXPORT_GZIP_LEVEL = 6
+EXPORT_WATERMARK_LAG = 30    # seconds; watermarks stay this far behind now so in-flight writes aren't skipped
+
+# ---------- Canonical Products ----------
+UNIFIED_PRODUCTS = True           # every entry point writes to PRODUCTS_COLLECTION; the query/category becomes a membership
+PRODUCTS_COLLECTION = "products"  # one document per ASIN with `categories` and per-category `ranks`
+
+# ---------- Browser Identities ----------
+# Each identity is its own browser context: user agent, viewport, locale and
+# timezone, an optional proxy ({"server": ..., "username": ..., "password": ...})
+# and cookies/storage persisted under IDENTITY_STATE_DIR between runs.
+IDENTITIES = [
+    {"name": "win-chrome", "user_agent": USER_AGENT,
+     "viewport": {"width": 1366, "height": 768}, "locale": "en-IN", "timezone_id": "Asia/Kolkata"},
+    {"name": "win-chrome-hd",
+     "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+     "viewport": {"width": 1920, "height": 1080}, "locale": "en-IN", "timezone_id": "Asia/Kolkata"},
+    {"name": "mac-chrome",
+     "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+     "viewport": {"width": 1440, "height": 900}, "locale": "en-GB", "timezone_id": "Asia/Kolkata"},
+    {"name": "linux-chrome",
+     "user_agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+     "viewport": {"width": 1536, "height": 864}, "locale": "en-US", "timezone_id": "Asia/Kolkata"},
+]
+IDENTITY_STATE_DIR = "browser_state"   # <name>.json storage state per identity ("" = don't persist)
+IDENTITY_SCORE_DECAY = 0.2     # weight of the newest outcome in an identity's moving averages
+IDENTITY_LATENCY_TARGET = 8    # seconds to a ready results page before latency starts to cost health
+IDENTITY_MIN_HEALTH = 0.3      # identities below this health are rested
+IDENTITY_REST = 900            # seconds a degraded identity sits out (its cookies are discarded)
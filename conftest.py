@@ -0,0 +1,2 @@
+# conftest.py
+# Keeps the project root importable (config, scraper, database ...) when running `pytest` from here.
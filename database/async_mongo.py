@@ -0,0 +1,177 @@
+import asyncio
+from pymongo import AsyncMongoClient
+from pymongo.errors import CollectionInvalid, OperationFailure, PyMongoError
+from config.settings import MONGO_URI, DB_NAME, HISTORY_ENABLED, HISTORY_COLLECTION
+from database.mongo_handler import (
+    build_product_doc,
+    diff_products,
+    history_points,
+    new_batch_stats,
+    apply_write_error,
+    category_key,
+    now_stamp,
+    product_indexes,
+    state_projection,
+)
+
+# Awaitable counterparts of database/mongo_handler.py on PyMongo's async client.
+# Document shaping and change detection are the same pure functions; only the
+# round trips differ, so database latency overlaps with browser I/O.
+_client = None
+_loop = None
+_history_ready = False
+
+
+# --- Client ---
+def get_db():
+    """The async database for the running event loop (a client can't be shared across loops)."""
+    global _client, _loop, _history_ready
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        _client = AsyncMongoClient(MONGO_URI)
+        _loop = loop
+        _history_ready = False
+    return _client[DB_NAME]
+
+
+def get_collection(name: str):
+    return get_db()[name]
+
+
+async def close_connection():
+    """Close the client bound to the running loop (call before asyncio.run returns)."""
+    global _client, _loop
+    if _client is not None and _loop is asyncio.get_running_loop():
+        await _client.close()
+    _client = _loop = None
+
+
+async def ensure_indexes(collection_name: str, categories=()):
+    try:
+        models = product_indexes(categories)
+        await get_collection(collection_name).create_indexes(models)
+        print(f"✅ Indexes ensured on '{collection_name}' (asin + {len(models) - 1} listing)")
+    except Exception as e:
+        print(f"❌ Failed to create index on '{collection_name}': {e}")
+
+
+# --- Queries ---
+async def find_one(collection_name: str, query: dict, projection: dict | None = None):
+    return await get_collection(collection_name).find_one(query, projection)
+
+
+async def find(collection_name: str, query: dict, projection: dict | None = None,
+               sort: list | None = None, limit: int = 0) -> list[dict]:
+    cursor = get_collection(collection_name).find(query, projection)
+    if sort:
+        cursor = cursor.sort(sort)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list(None)
+
+
+async def stored_state(collection, asins: list[str]) -> dict:
+    """ASIN -> stored content_hash, membership (with per-category tags) and history fields for the products that already exist."""
+    return {d["asin"]: d async for d in collection.find({"asin": {"$in": asins}}, state_projection())}
+
+
+# --- Price / Rating History ---
+async def ensure_history_collection():
+    global _history_ready
+    if _history_ready:
+        return
+    db = get_db()
+    try:
+        await db.create_collection(
+            HISTORY_COLLECTION,
+            timeseries={"timeField": "ts", "metaField": "meta", "granularity": "hours"},
+        )
+        print(f"✅ Time-series collection '{HISTORY_COLLECTION}' created")
+    except CollectionInvalid:
+        pass  # already exists
+    except OperationFailure as e:
+        print(f"⚠️ Time-series collections unavailable, using a plain collection: {e}")
+    try:
+        await db[HISTORY_COLLECTION].create_index([("meta.asin", 1), ("ts", -1)])
+        _history_ready = True
+    except Exception as e:
+        print(f"❌ Failed to create index on '{HISTORY_COLLECTION}': {e}")
+
+
+async def record_history(points: list[dict]) -> int:
+    if not (HISTORY_ENABLED and points):
+        return 0
+    await ensure_history_collection()
+    try:
+        await get_collection(HISTORY_COLLECTION).insert_many(points, ordered=False)
+        return len(points)
+    except PyMongoError as e:
+        print(f"❌ Failed to record {len(points)} history points: {e}")
+        return 0
+
+
+# --- Writes ---
+async def write_batch(collection_name: str, docs: list[dict]) -> dict:
+    """
+    Upsert already-normalised products (build_product_doc output) in one
+    unordered bulk_write, skipping unchanged ones. Returns the batch stats.
+    """
+    stats = new_batch_stats(collection_name, docs)
+    collection = get_collection(collection_name)
+    try:
+        state = await stored_state(collection, [d["asin"] for d in docs])
+        ops, counts = diff_products(docs, state)
+        stats.update(counts)
+        if ops:
+            result = await collection.bulk_write(ops, ordered=False)
+            stats["upserted"] = result.upserted_count
+            stats["modified"] = result.modified_count
+            stats["history"] = await record_history(history_points(docs, state, collection_name))
+    except PyMongoError as e:
+        apply_write_error(stats, e)
+    return stats
+
+
+async def clear_stale_ranks(collection_name: str, category: str, asins: list[str],
+                            max_rank: int | None = None) -> int:
+    """
+    Drop ranks.<category> from products the latest scrape of that category
+    didn't find. Pass `max_rank` when the scrape stopped before the end of the
+    listing: only ranks it covered (<= max_rank) can be known to be stale.
+    """
+    key = category_key(category)
+    rank = {"$exists": True} if max_rank is None else {"$lte": max_rank}
+    try:
+        result = await get_collection(collection_name).update_many(
+            {"categories": key, f"ranks.{key}": rank, "asin": {"$nin": asins}},
+            {"$unset": {f"ranks.{key}": ""}, "$set": {"last_updated": now_stamp()}},
+        )
+        return result.modified_count
+    except PyMongoError as e:
+        print(f"❌ Failed to clear stale '{key}' ranks in '{collection_name}': {e}")
+        return 0
+
+
+async def bulk_upsert(docs: list[dict], collection_name: str) -> dict:
+    """Normalise raw scraped products and write them as one batch."""
+    stored = {}
+    for doc in docs:
+        doc_to_store = build_product_doc(doc)
+        if doc_to_store is not None:
+            stored[doc_to_store["asin"]] = doc_to_store
+    stats = await write_batch(collection_name, list(stored.values()))
+    stats["skipped"] = len(docs) - len(stored)
+    return stats
+
+
+async def upsert_product(doc: dict, collection_name: str):
+    """Awaitable upsert_product: same skip-if-unchanged semantics, one product."""
+    doc_to_store = build_product_doc(doc)
+    if doc_to_store is None:
+        print(f"⚠️ Skipping incomplete product: ASIN={doc.get('asin')}, Title={doc.get('title')}")
+        return
+
+    stats = await write_batch(collection_name, [doc_to_store])
+    if not stats["failed"]:
+        outcome = next(k for k in ("new", "changed", "unchanged") if stats[k])
+        print(f"✅ {outcome.capitalize()} in '{collection_name}': {doc_to_store['title']} | ASIN: {doc_to_store['asin']} | Brand: {doc_to_store['brand']}")
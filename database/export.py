@@ -0,0 +1,246 @@
+# database/export.py
+
+import asyncio
+import csv
+import io
+import json
+import time
+import zlib
+from datetime import datetime, timedelta
+from config.settings import EXPORT_BATCH_SIZE, EXPORT_GZIP_LEVEL, EXPORT_WATERMARK_LAG, PRODUCT_DEFAULT_FIELDS
+from database.async_mongo import get_collection
+from database.mongo_handler import IST
+
+# Streams a product collection out as JSONL, CSV or Parquet. Documents are
+# read in cursor batches and each batch is encoded (and compressed) into one
+# bytes chunk, so memory stays at one batch whatever the collection size.
+
+FORMATS = {
+    "jsonl": ("jsonl", "application/x-ndjson"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+COMPRESSIONS = {
+    "gzip": ("gz", "application/gzip"),
+    "zstd": ("zst", "application/zstd"),
+}
+
+
+# ---------- Encoders ----------
+class JsonlEncoder:
+    def __init__(self, fields: list[str]):
+        self.fields = fields
+
+    def encode(self, docs: list[dict]) -> bytes:
+        return "".join(json.dumps(d, default=str, ensure_ascii=False) + "\n" for d in docs).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    """One header row, then one row per product; lists are joined with '|', dicts stored as JSON."""
+
+    def __init__(self, fields: list[str]):
+        self.fields = fields
+        self._header = True
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, list):
+            return "|".join(str(v) for v in value)
+        if isinstance(value, dict):
+            return json.dumps(value, default=str, ensure_ascii=False)
+        return "" if value is None else value
+
+    def encode(self, docs: list[dict]) -> bytes:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        if self._header:
+            writer.writerow(self.fields)
+            self._header = False
+        writer.writerows([self._cell(_field(d, f)) for f in self.fields] for d in docs)
+        return out.getvalue().encode()
+
+    def close(self) -> bytes:
+        return b"" if not self._header else self.encode([])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back in pieces instead of keeping them."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """One row group per batch against a fixed schema (needs pyarrow)."""
+
+    TYPES = {"price": "float64", "rating": "float64", "reviews": "int64", "tags": "list<string>"}
+
+    def __init__(self, fields: list[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.fields = fields
+        self._pa = pa
+        types = {"float64": pa.float64(), "int64": pa.int64(), "list<string>": pa.list_(pa.string())}
+        self._schema = pa.schema([(f, types.get(self.TYPES.get(f), pa.string())) for f in fields])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+
+    def _column(self, field: str, docs: list[dict]) -> list:
+        kind = self.TYPES.get(field)
+        values = [_field(d, field) for d in docs]
+        if kind == "float64":
+            return [float(v) if v is not None else None for v in values]
+        if kind == "int64":
+            return [int(v) if v is not None else None for v in values]
+        if kind == "list<string>":
+            return [[str(x) for x in v] if isinstance(v, list) else None for v in values]
+        return [v if v is None or isinstance(v, str) else json.dumps(v, default=str) for v in values]
+
+    def encode(self, docs: list[dict]) -> bytes:
+        columns = [self._column(f, docs) for f in self.fields]
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        self._writer.close()   # writes the footer
+        return self._sink.take()
+
+
+ENCODERS = {"jsonl": JsonlEncoder, "csv": CsvEncoder, "parquet": ParquetEncoder}
+
+
+def _field(doc: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+# ---------- Compression ----------
+class _Uncompressed:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def compressor(codec: str | None):
+    """A streaming compressor with compress()/flush() (zstd needs the zstandard package)."""
+    if not codec:
+        return _Uncompressed()
+    if codec == "gzip":
+        return zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)   # wbits 31 = gzip container
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unknown compression {codec!r}; use one of {list(COMPRESSIONS)}")
+
+
+def file_extension(fmt: str, codec: str | None = None) -> str:
+    ext = FORMATS[fmt][0]
+    return f"{ext}.{COMPRESSIONS[codec][0]}" if codec else ext
+
+
+def media_type(fmt: str, codec: str | None = None) -> str:
+    return COMPRESSIONS[codec][1] if codec else FORMATS[fmt][1]
+
+
+# ---------- Export ----------
+async def current_watermark(collection_name: str, lag: float = EXPORT_WATERMARK_LAG) -> str | None:
+    """
+    The newest last_updated in the collection, but no later than `lag` seconds
+    ago: pass it as `since` next time to get only later changes. Writers stamp
+    last_updated before their bulk_write commits, so a stamp newer than that
+    may still have writes from another process in flight; holding the
+    watermark back lets the next export pick those up instead of skipping them.
+    """
+    cutoff = (datetime.now(IST) - timedelta(seconds=lag)).isoformat()
+    doc = await get_collection(collection_name).find_one(
+        {"last_updated": {"$ne": None, "$lte": cutoff}}, {"_id": 0, "last_updated": 1}, sort=[("last_updated", -1)])
+    return doc["last_updated"] if doc else None
+
+
+def export_query(since: str | None = None, until: str | None = None) -> dict:
+    bounds = {}
+    if since:
+        bounds["$gt"] = since
+    if until:
+        bounds["$lte"] = until
+    return {"last_updated": bounds} if bounds else {}
+
+
+async def export_stream(collection_name: str, fmt: str = "jsonl", fields: list[str] | None = None,
+                        since: str | None = None, until: str | None = None, compression: str | None = None,
+                        batch_size: int = EXPORT_BATCH_SIZE, stats: dict | None = None):
+    """
+    Async generator of encoded (and compressed) chunks for the products with
+    since < last_updated <= until. Encoding runs in a worker thread so a large
+    export doesn't stall the event loop. `stats` (if given) is filled in as it goes.
+    """
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unknown format {fmt!r}; use one of {list(ENCODERS)}")
+    fields = fields or PRODUCT_DEFAULT_FIELDS
+    encoder = ENCODERS[fmt](fields)
+    packer = compressor(compression)
+    stats = stats if stats is not None else {}
+    stats.update({"rows": 0, "batches": 0, "bytes": 0})
+    started = time.monotonic()
+
+    def pack(docs):
+        return packer.compress(encoder.encode(docs))
+
+    def finish():
+        return packer.compress(encoder.close()) + packer.flush()
+
+    projection = {"_id": 0, **{f: 1 for f in fields}}
+    # (last_updated, asin) is one of the listing indexes, so incremental exports are a range scan
+    sort = [("last_updated", 1), ("asin", 1)] if since or until else None
+    cursor = get_collection(collection_name).find(export_query(since, until), projection,
+                                                  sort=sort, batch_size=batch_size)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            chunk = await asyncio.to_thread(pack, batch)
+            stats["rows"] += len(batch)
+            stats["batches"] += 1
+            batch = []
+            if chunk:
+                stats["bytes"] += len(chunk)
+                yield chunk
+    chunk = await asyncio.to_thread(pack, batch) if batch else b""
+    stats["rows"] += len(batch)
+    stats["batches"] += 1 if batch else 0
+    chunk += await asyncio.to_thread(finish)
+    if chunk:
+        stats["bytes"] += len(chunk)
+        yield chunk
+    stats["seconds"] = round(time.monotonic() - started, 2)
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config.settings import (
+    QUEUE_COLLECTION,
+    QUEUE_VISIBILITY_TIMEOUT,
+    QUEUE_MAX_ATTEMPTS,
+    QUEUE_RETRY_BASE,
+    QUEUE_RETRY_MAX,
+)
+from database.async_mongo import get_collection
+
+# Job lifecycle: queued -> leased -> done | failed (or back to queued for a retry).
+# A leased job whose lease expires is visible again, so a crashed worker loses nothing.
+def _jobs():
+    return get_collection(QUEUE_COLLECTION)
+
+
+async def ensure_queue_indexes():
+    jobs = _jobs()
+    await jobs.create_index([("status", ASCENDING), ("available_at", ASCENDING)])
+    await jobs.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+    await jobs.create_index("dedupe_key", unique=True, partialFilterExpression={"dedupe_key": {"$type": "string"}})
+
+
+class JobDeferred(Exception):
+    """Raised by a job handler to put its job back until `retry_at` without spending an attempt."""
+
+    def __init__(self, message: str, retry_at: datetime, payload: dict | None = None, result=None):
+        super().__init__(message)
+        self.retry_at = retry_at
+        self.payload = payload
+        self.result = result
+
+
+# ---------- Producer ----------
+async def enqueue(kind: str, payload: dict, dedupe_key: str | None = None,
+            max_attempts: int = QUEUE_MAX_ATTEMPTS, available_at: datetime | None = None):
+    """
+    Add a job. Returns its id, or None when a job with the same dedupe_key
+    already exists (so two schedulers can't queue the same run twice).
+    """
+    now = datetime.now()
+    job = {
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "available_at": available_at or now,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    if dedupe_key:
+        job["dedupe_key"] = dedupe_key
+    try:
+        return (await _jobs().insert_one(job)).inserted_id
+    except DuplicateKeyError:
+        return None
+
+
+# ---------- Consumer ----------
+async def lease(worker_id: str, visibility_timeout: int = QUEUE_VISIBILITY_TIMEOUT):
+    """Atomically claim the oldest runnable job (or an expired lease). Returns the job or None."""
+    now = datetime.now()
+    return await _jobs().find_one_and_update(
+        {"$or": [
+            {"status": "queued", "available_at": {"$lte": now}},
+            {"status": "leased", "lease_expires_at": {"$lte": now}},
+        ]},
+        {
+            "$set": {
+                "status": "leased",
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=visibility_timeout),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("available_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def heartbeat(job_id, worker_id: str, visibility_timeout: int = QUEUE_VISIBILITY_TIMEOUT) -> bool:
+    """Extend a lease we still own. False means the job was taken over by another worker."""
+    now = datetime.now()
+    result = await _jobs().update_one(
+        {"_id": job_id, "status": "leased", "lease_owner": worker_id},
+        {"$set": {"lease_expires_at": now + timedelta(seconds=visibility_timeout), "updated_at": now}},
+    )
+    return result.matched_count == 1
+
+
+async def complete(job_id, worker_id: str, result=None) -> bool:
+    now = datetime.now()
+    updated = await _jobs().update_one(
+        {"_id": job_id, "lease_owner": worker_id},
+        {"$set": {"status": "done", "result": result, "error": None,
+                  "lease_expires_at": None, "finished_at": now, "updated_at": now}},
+    )
+    return updated.matched_count == 1
+
+
+async def fail(job_id, worker_id: str, error: str) -> str | None:
+    """
+    Record a failed attempt. The job is re-queued with exponential backoff
+    until max_attempts is reached, then marked failed. Returns the new status.
+    """
+    job = await _jobs().find_one({"_id": job_id, "lease_owner": worker_id}, {"attempts": 1, "max_attempts": 1})
+    if job is None:
+        return None
+    now = datetime.now()
+    if job["attempts"] < job["max_attempts"]:
+        delay = min(QUEUE_RETRY_MAX, QUEUE_RETRY_BASE * 2 ** (job["attempts"] - 1))
+        update = {"status": "queued", "available_at": now + timedelta(seconds=delay)}
+    else:
+        update = {"status": "failed", "finished_at": now}
+    await _jobs().update_one(
+        {"_id": job_id, "lease_owner": worker_id},
+        {"$set": {**update, "error": error, "lease_owner": None, "lease_expires_at": None, "updated_at": now}},
+    )
+    return update["status"]
+
+
+async def defer(job_id, worker_id: str, deferred: JobDeferred) -> bool:
+    """Re-queue a leased job for deferred.retry_at; the attempt is given back."""
+    now = datetime.now()
+    update = {"status": "queued", "available_at": deferred.retry_at, "error": str(deferred),
+              "result": deferred.result, "lease_owner": None, "lease_expires_at": None, "updated_at": now}
+    if deferred.payload is not None:
+        update["payload"] = deferred.payload
+    result = await _jobs().update_one(
+        {"_id": job_id, "lease_owner": worker_id},
+        {"$set": update, "$inc": {"attempts": -1, "deferrals": 1}},
+    )
+    return result.matched_count == 1
+
+
+async def get_job(job_id):
+    return await _jobs().find_one({"_id": job_id})
@@ -1,7 +1,32 @@
+import asyncio
+import atexit
+import hashlib
+import json
+import re
+import threading
+import time
+import weakref
 from datetime import datetime
 import pymongo
+from pymongo import IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, OperationFailure, PyMongoError
+from utils.timing import record as record_timing
 from zoneinfo import ZoneInfo   # Requires Python 3.9+ and tzdata installed
-from config.settings import MONGO_URI, DB_NAME
+from config.settings import (
+    MONGO_URI,
+    DB_NAME,
+    CATEGORIES,
+    SCHEDULE_DEFAULT_CATEGORIES,
+    BULK_BATCH_SIZE,
+    BULK_FLUSH_INTERVAL,
+    TOUCH_LAST_SEEN,
+    HISTORY_ENABLED,
+    HISTORY_COLLECTION,
+    PRODUCT_SORT_FIELDS,
+    PRODUCT_INDEX_PREFIXES,
+    UNIFIED_PRODUCTS,
+    PRODUCTS_COLLECTION,
+)
 
 # --- MongoDB Client & Database ---
 client = pymongo.MongoClient(MONGO_URI)
@@ -10,63 +35,485 @@ db = client[DB_NAME]
 # --- Timezone (IST) ---
 IST = ZoneInfo("Asia/Kolkata")
 
+def now_stamp() -> str:
+    """`last_updated` value for a write happening now (exports read changes by it)."""
+    return datetime.now(IST).isoformat()
+
 # --- Collection Helpers ---
 def get_collection(name: str):
     """Return a MongoDB collection by name."""
     return db[name]
 
-def ensure_indexes(collection_name: str):
+def product_collection(collection_name: str) -> str:
+    """Where products scraped for `collection_name` are stored: the canonical collection unless UNIFIED_PRODUCTS is off."""
+    return PRODUCTS_COLLECTION if UNIFIED_PRODUCTS else collection_name
+
+def category_key(name: str) -> str:
+    """Category/query as stored in `categories` and as a `ranks` key (no dots or leading $)."""
+    return re.sub(r"^\$+|\.", "_", " ".join(str(name).lower().split()))
+
+def product_indexes(categories=()) -> list[IndexModel]:
+    """
+    Unique ASIN plus one (filter, sort field, asin) index per listing the read
+    API serves, so a filtered, sorted page is a bounded index walk. `asin` is
+    the keyset tie-breaker, which makes every sort order total.
+
+    `sort=rank` listings get a (categories, ranks.<category>, asin) index for
+    each configured query (CATEGORIES, SCHEDULE_DEFAULT_CATEGORIES) and for
+    `categories`, so the scrapers pass the query they are about to write.
+    A rank listing for a category never scraped has no ranks to sort by.
     """
-    Ensure unique index on ASIN for faster upserts.
-    Call this once per collection at startup.
+    models = [IndexModel("asin", unique=True)]
+    for prefix in PRODUCT_INDEX_PREFIXES:
+        for field in PRODUCT_SORT_FIELDS:
+            keys = ([(prefix, 1)] if prefix else []) + [(field, 1), ("asin", 1)]
+            models.append(IndexModel(keys))
+    for key in dict.fromkeys(category_key(q) for q in (*CATEGORIES, *SCHEDULE_DEFAULT_CATEGORIES, *categories)):
+        models.append(IndexModel([("categories", 1), (f"ranks.{key}", 1), ("asin", 1)]))
+    return models
+
+def ensure_indexes(collection_name: str, categories=()):
+    """
+    Ensure the unique ASIN index (for faster upserts) and the listing indexes,
+    including rank indexes for `categories`. Call this once per collection at startup.
     """
     collection = db[collection_name]
     try:
-        collection.create_index("asin", unique=True)
-        print(f"✅ Index ensured on '{collection_name}' (asin)")
+        models = product_indexes(categories)
+        collection.create_indexes(models)
+        print(f"✅ Indexes ensured on '{collection_name}' (asin + {len(models) - 1} listing)")
     except Exception as e:
         print(f"❌ Failed to create index on '{collection_name}': {e}")
 
+# --- Document Normalisation ---
+# Fields whose change counts as a product update (timestamps are excluded)
+HASH_FIELDS = ("title", "price", "rating", "reviews", "image_url", "product_url", "tags", "brand")
+
+def content_hash(doc: dict) -> str:
+    """Compact, stable fingerprint of a product's meaningful fields."""
+    payload = json.dumps([doc.get(f) for f in HASH_FIELDS], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+def build_product_doc(doc: dict) -> dict | None:
+    """
+    Normalise a scraped product into the stored shape.
+    Returns None when the product lacks an ASIN or title.
+    """
+    asin = doc.get("asin")
+    title = doc.get("title")
+    if not (asin and title):
+        return None
+
+    stored = {
+        "asin": asin,
+        "title": title,
+        "price": doc.get("price") or 0,  # Allow missing price
+        "rating": doc.get("rating") or 0.0,
+        "reviews": doc.get("reviews") or 0,
+        "image_url": doc.get("image_url") or "https://via.placeholder.com/150",
+        "product_url": doc.get("product_url") or f"https://www.amazon.in/dp/{asin}",
+        "tags": doc.get("tags") or [],
+        "brand": doc.get("brand") or "Unknown",
+    }
+    stored["content_hash"] = content_hash(stored)
+    # Membership is kept out of the hash: being found under another category isn't a product change
+    category = category_key(doc.get("category") or "")
+    stored["categories"] = [category] if category else []
+    stored["ranks"] = {category: doc["rank"]} if category and doc.get("rank") else {}
+    stored["category_tags"] = {category: stored["tags"]} if category else {}
+    return stored
+
+# --- Category Membership ---
+# One stored product can be surfaced by many categories/queries. `category_tags`
+# keeps the tags each category's classification gave it; `tags` is their union.
+MEMBERSHIP_FIELDS = ("categories", "ranks", "category_tags")
+
+def _union(*lists) -> list:
+    return list(dict.fromkeys(x for values in lists for x in (values or [])))
+
+def merge_product(old: dict, new: dict) -> dict:
+    """Fold two sightings of one product: latest values, every category, rank and tag."""
+    merged = {
+        **new,
+        "tags": _union(old.get("tags"), new.get("tags")),
+        "categories": _union(old.get("categories"), new.get("categories")),
+        "ranks": {**(old.get("ranks") or {}), **(new.get("ranks") or {})},
+        "category_tags": {**(old.get("category_tags") or {}), **(new.get("category_tags") or {})},
+    }
+    merged["content_hash"] = content_hash(merged)
+    return merged
+
+def product_tags(stored: dict, doc: dict) -> list:
+    """Current tags: each category's latest classification (the doc's replaces the stored one), combined."""
+    tag_sets = {**(stored.get("category_tags") or {}), **(doc.get("category_tags") or {})}
+    if not tag_sets:
+        return doc.get("tags") or []
+    order = _union(stored.get("categories"), doc.get("categories"), tag_sets)
+    return _union(*(tag_sets.get(c) for c in order))
+
+def product_update(categories: list[str], ranks: dict, fields: dict | None = None,
+                   category_tags: dict | None = None, stale_ranks: list[str] = ()) -> dict:
+    """
+    Update document for one product: $set `fields` (product data), add the
+    categories and set the ranks and per-category tags without touching
+    other categories' entries. `stale_ranks` are categories whose rank is dropped.
+    """
+    update = {}
+    changes = {
+        **(fields or {}),
+        **{f"ranks.{c}": r for c, r in ranks.items()},
+        **{f"category_tags.{c}": t for c, t in (category_tags or {}).items()},
+    }
+    if changes:
+        update["$set"] = changes
+    if categories:
+        update["$addToSet"] = {"categories": {"$each": categories}}
+    if stale_ranks:
+        update["$unset"] = {f"ranks.{c}": "" for c in stale_ranks}
+    return update
+
+# --- Change Detection ---
+def state_projection() -> dict:
+    return {"_id": 0, "asin": 1, "content_hash": 1, "detail.brand": 1,
+            **{f: 1 for f in MEMBERSHIP_FIELDS}, **{f: 1 for f in HISTORY_FIELDS}}
+
+def stored_state(collection, asins: list[str]) -> dict:
+    """ASIN -> stored content_hash, membership (with per-category tags) and history fields for the products that already exist."""
+    cursor = collection.find({"asin": {"$in": asins}}, state_projection())
+    return {d["asin"]: d for d in cursor}
+
+def diff_products(docs: list[dict], state: dict) -> tuple[list[UpdateOne], dict]:
+    """
+    Build the write operations for `docs` given the stored state.
+    New and changed products get a full $set; unchanged ones are skipped,
+    or only have `last_seen` bumped when TOUCH_LAST_SEEN is on.
+    A brand from an enriched detail page replaces the SERP title guess.
+    Tags are the product's current classification under each of its
+    categories, so a taxonomy change replaces old tags instead of piling up.
+    A category the product was found under without a rank loses its stored
+    rank. Membership changes alone are written on their own (counted as
+    `membership`) when nothing else changed.
+    Every write stamps `last_updated` with the flush time, not the time the
+    product was queued, so incremental exports see it.
+    """
+    counts = {"new": 0, "changed": 0, "unchanged": 0, "membership": 0}
+    seen_at = now_stamp()
+    ops = []
+    for doc in docs:
+        asin = doc["asin"]
+        stored = state.get(asin) or {}
+        detail_brand = (stored.get("detail") or {}).get("brand")
+        tags = product_tags(stored, doc)
+        if (detail_brand and doc["brand"] != detail_brand) or tags != doc["tags"]:
+            doc = {**doc, "brand": detail_brand or doc["brand"], "tags": tags}
+            doc["content_hash"] = content_hash(doc)
+        stored_ranks = stored.get("ranks") or {}
+        stored_tags = stored.get("category_tags") or {}
+        categories = [c for c in doc.get("categories", []) if c not in (stored.get("categories") or [])]
+        ranks = {c: r for c, r in doc.get("ranks", {}).items() if stored_ranks.get(c) != r}
+        category_tags = {c: t for c, t in doc.get("category_tags", {}).items() if stored_tags.get(c) != t}
+        stale_ranks = [c for c in doc.get("categories", []) if c in stored_ranks and c not in doc.get("ranks", {})]
+        touch = {"last_seen": seen_at} if TOUCH_LAST_SEEN else {}
+        if asin not in state:
+            counts["new"] += 1
+        elif stored.get("content_hash") != doc["content_hash"]:
+            counts["changed"] += 1
+        else:
+            counts["unchanged"] += 1
+            membership = categories or ranks or category_tags or stale_ranks
+            if membership:
+                counts["membership"] += 1
+            if membership or touch:
+                stamp = {**touch, "last_updated": seen_at} if membership else touch
+                ops.append(UpdateOne({"asin": asin}, product_update(categories, ranks, stamp, category_tags, stale_ranks)))
+            continue
+        fields = {k: v for k, v in doc.items() if k not in MEMBERSHIP_FIELDS}
+        fields["last_updated"] = seen_at
+        update = product_update(doc.get("categories", []), doc.get("ranks", {}), {**fields, **touch},
+                                doc.get("category_tags", {}), stale_ranks)
+        ops.append(UpdateOne({"asin": asin}, update, upsert=True))
+    return ops, counts
+
+# --- Price / Rating History ---
+# Values tracked over time; a point is stored only when one of them changes
+HISTORY_FIELDS = ("price", "rating", "reviews")
+_history_ready = False
+
+def ensure_history_collection():
+    """
+    Create the history store as a time-series collection (MongoDB 5.0+),
+    falling back to a plain collection, with an (asin, ts) index.
+    """
+    global _history_ready
+    if _history_ready:
+        return
+    try:
+        db.create_collection(
+            HISTORY_COLLECTION,
+            timeseries={"timeField": "ts", "metaField": "meta", "granularity": "hours"},
+        )
+        print(f"✅ Time-series collection '{HISTORY_COLLECTION}' created")
+    except CollectionInvalid:
+        pass  # already exists
+    except OperationFailure as e:
+        print(f"⚠️ Time-series collections unavailable, using a plain collection: {e}")
+    try:
+        db[HISTORY_COLLECTION].create_index([("meta.asin", 1), ("ts", -1)])
+        _history_ready = True
+    except Exception as e:
+        print(f"❌ Failed to create index on '{HISTORY_COLLECTION}': {e}")
+
+# build_product_doc stores a missing price/rating as 0; in the series that would read as a real ₹0 / 0★
+OPTIONAL_HISTORY_FIELDS = ("price", "rating")
+
+def history_values(doc: dict) -> dict:
+    """Tracked values of a product, with None for a price or rating the card didn't show."""
+    return {f: (doc.get(f) or None) if f in OPTIONAL_HISTORY_FIELDS else doc.get(f) for f in HISTORY_FIELDS}
+
+def history_points(docs: list[dict], state: dict, collection_name: str) -> list[dict]:
+    """
+    History points for new products and for products whose tracked values
+    moved. A value missing from this sighting isn't a move, so a card that
+    omits the price doesn't add a point (or a dip to 0) between real prices.
+    """
+    ts = datetime.now(IST)
+    points = []
+    for doc in docs:
+        values = history_values(doc)
+        previous = state.get(doc["asin"])
+        if previous is not None:
+            before = history_values(previous)
+            if all(v is None or v == before[f] for f, v in values.items()):
+                continue
+        points.append({
+            "ts": ts,
+            "meta": {"asin": doc["asin"], "collection": collection_name},
+            **values,
+        })
+    return points
+
+def record_history(points: list[dict]) -> int:
+    if not (HISTORY_ENABLED and points):
+        return 0
+    ensure_history_collection()
+    try:
+        db[HISTORY_COLLECTION].insert_many(points, ordered=False)
+        return len(points)
+    except PyMongoError as e:
+        print(f"❌ Failed to record {len(points)} history points: {e}")
+        return 0
+
 # --- Upsert Logic ---
 def upsert_product(doc: dict, collection_name: str):
     """
     Insert or update a product document in MongoDB.
-    Uses ASIN as the unique identifier within the given collection.
+    Uses ASIN as the unique identifier within the given collection;
+    the write is skipped when the product's content hash is unchanged.
     """
-    asin = doc.get("asin")
-    title = doc.get("title")
-    price = doc.get("price") or 0  # Allow missing price
+    doc_to_store = build_product_doc(doc)
+    if doc_to_store is None:
+        print(f"⚠️ Skipping incomplete product: ASIN={doc.get('asin')}, Title={doc.get('title')}")
+        return
 
-    if asin and title:
-        collection = db[collection_name]
+    asin = doc_to_store["asin"]
+    collection = db[collection_name]
+    try:
+        state = stored_state(collection, [asin])
+        ops, counts = diff_products([doc_to_store], state)
+        if ops:
+            collection.bulk_write(ops)
+            record_history(history_points([doc_to_store], state, collection_name))
+        outcome = next(k for k, v in counts.items() if v)
+        print(f"✅ {outcome.capitalize()} in '{collection_name}': {doc_to_store['title']} | ASIN: {asin} | Brand: {doc_to_store['brand']}")
+    except Exception as e:
+        print(f"❌ MongoDB error for ASIN={asin}: {e}")
 
-        rating = doc.get("rating") or 0.0
-        reviews = doc.get("reviews") or 0
-        image_url = doc.get("image_url") or "https://via.placeholder.com/150"
-        product_url = doc.get("product_url") or f"https://www.amazon.in/dp/{asin}"
-        tags = doc.get("tags") or []
-        brand = doc.get("brand") or "Unknown"
-
-        doc_to_store = {
-            "asin": asin,
-            "title": title,
-            "price": price,
-            "rating": rating,
-            "reviews": reviews,
-            "image_url": image_url,
-            "product_url": product_url,
-            "tags": tags,
-            "brand": brand,
-            "last_updated": datetime.now(IST).isoformat()
-        }
+# --- Bulk Writer ---
+def new_batch_stats(collection_name: str, docs: list[dict]) -> dict:
+    return {"collection": collection_name, "products": len(docs), "new": 0, "changed": 0,
+            "unchanged": 0, "membership": 0, "upserted": 0, "modified": 0, "failed": 0, "history": 0}
 
-        try:
-            collection.update_one({"asin": asin}, {"$set": doc_to_store}, upsert=True)
-            print(f"✅ Stored in '{collection_name}': {title} | ASIN: {asin} | Brand: {brand}")
-        except Exception as e:
-            print(f"❌ MongoDB error for ASIN={asin}: {e}")
+def apply_write_error(stats: dict, error: PyMongoError):
+    """Fold a failed bulk_write into the batch stats."""
+    if isinstance(error, BulkWriteError):
+        details = error.details
+        stats["upserted"] = details.get("nUpserted", 0)
+        stats["modified"] = details.get("nModified", 0)
+        stats["failed"] = len(details.get("writeErrors", []))
+        print(f"❌ Bulk write errors in '{stats['collection']}': {details.get('writeErrors', [])[:3]}")
     else:
-        print(f"⚠️ Skipping incomplete product: ASIN={asin}, Title={title}")
+        stats["failed"] = stats["products"]
+        print(f"❌ Bulk write failed for '{stats['collection']}': {error}")
+
+_open_writers = weakref.WeakSet()
+
+class BulkProductWriter:
+    """
+    Buffer product upserts per collection and flush them with unordered
+    bulk_write once `batch_size` products are queued or `flush_interval`
+    seconds have passed since the last flush.
+
+    Each flush looks up the stored content hashes of the batch in one query
+    and only writes new or changed products. With one writer shared by a
+    run, a product surfaced by several categories is merged in the buffer
+    and stored once with all of its memberships.
+
+    Used from async code (aadd), a background task also flushes a partial
+    batch once it is `flush_interval` old, so products from a category that
+    has finished don't wait for the next add or aclose().
+
+    Use as a context manager (or call close()) to flush on shutdown; any
+    writer still open at interpreter exit is flushed by an atexit hook.
+    """
+
+    def __init__(self, batch_size: int = BULK_BATCH_SIZE, flush_interval: float = BULK_FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.totals = {"queued": 0, "skipped": 0, "new": 0, "changed": 0, "unchanged": 0,
+                       "membership": 0, "upserted": 0, "modified": 0, "failed": 0}
+        self._docs: dict[str, dict[str, dict]] = {}   # collection -> asin -> latest doc
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+        _open_writers.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        return sum(len(docs) for docs in self._docs.values())
+
+    def _flush_due(self) -> bool:
+        return self.pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval
+
+    def add(self, doc: dict, collection_name: str) -> bool:
+        """Queue one product; flushes when the batch is full or stale. Returns False if skipped."""
+        if not self._queue(doc, collection_name):
+            return False
+        if self._flush_due():
+            self.flush()
+        return True
+
+    def _queue(self, doc: dict, collection_name: str) -> bool:
+        doc_to_store = build_product_doc(doc)
+        with self._lock:
+            if doc_to_store is None:
+                self.totals["skipped"] += 1
+                return False
+            # A product seen twice before a flush is written once: latest values, every category it was found under
+            queued = self._docs.setdefault(collection_name, {})
+            previous = queued.get(doc_to_store["asin"])
+            queued[doc_to_store["asin"]] = merge_product(previous, doc_to_store) if previous else doc_to_store
+            self.totals["queued"] += 1
+            return True
+
+    def flush(self) -> list[dict]:
+        """Write every queued product. Returns per-batch counts."""
+        return [self._write_batch(name, docs) for name, docs in self._take_batches()]
+
+    def _take_batches(self) -> list[tuple[str, list[dict]]]:
+        """Swap out the buffer and split it into (collection, docs) batches of at most batch_size."""
+        with self._lock:
+            pending, self._docs = self._docs, {}
+            self._last_flush = time.monotonic()
+        batches = []
+        for collection_name, by_asin in pending.items():
+            docs = list(by_asin.values())
+            for start in range(0, len(docs), self.batch_size):
+                batches.append((collection_name, docs[start:start + self.batch_size]))
+        return batches
+
+    def _write_batch(self, collection_name: str, docs: list[dict]) -> dict:
+        stats = new_batch_stats(collection_name, docs)
+        collection = db[collection_name]
+        started = time.perf_counter()
+        try:
+            state = stored_state(collection, [d["asin"] for d in docs])
+            ops, counts = diff_products(docs, state)
+            stats.update(counts)
+            if ops:
+                result = collection.bulk_write(ops, ordered=False)
+                stats["upserted"] = result.upserted_count
+                stats["modified"] = result.modified_count
+                stats["history"] = record_history(history_points(docs, state, collection_name))
+        except PyMongoError as e:
+            apply_write_error(stats, e)
+        return self._account(stats, started)
+
+    def _account(self, stats: dict, started: float) -> dict:
+        record_timing("mongo_write", time.perf_counter() - started)
+        with self._lock:
+            for key in ("new", "changed", "unchanged", "membership", "upserted", "modified", "failed"):
+                self.totals[key] += stats[key]
+        print(f"💾 Flushed {stats['products']} products to '{stats['collection']}' | "
+              f"new={stats['new']} changed={stats['changed']} unchanged={stats['unchanged']} "
+              f"membership={stats['membership']} | "
+              f"upserted={stats['upserted']} modified={stats['modified']} failed={stats['failed']} "
+              f"history={stats['history']}")
+        return stats
+
+    async def aadd(self, doc: dict, collection_name: str) -> bool:
+        """Async add: flushes through the async client so the event loop keeps going."""
+        if not self._queue(doc, collection_name):
+            return False
+        self._start_timer()
+        if self._flush_due():
+            await self.aflush()
+        return True
+
+    def _start_timer(self):
+        if self._timer is None or self._timer.done() or self._timer.get_loop() is not asyncio.get_running_loop():
+            self._timer = asyncio.create_task(self._flush_stale())
+
+    async def _flush_stale(self):
+        """
+        Flush a partial batch once it has waited flush_interval, even if nothing
+        else is added. Ends once the buffer is empty (the next aadd starts a new
+        one), so a writer that is never closed doesn't keep a task alive.
+        """
+        while self.pending:
+            age = time.monotonic() - self._last_flush
+            await asyncio.sleep(max(0.05, self.flush_interval - age))
+            if self.pending and time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    await self.aflush()
+                except Exception as e:
+                    print(f"❌ Background flush failed: {e}")
+
+    def _stop_timer(self):
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+
+    async def aflush(self) -> list[dict]:
+        from database.async_mongo import write_batch  # async_mongo builds on this module
+
+        results = []
+        for collection_name, docs in self._take_batches():
+            started = time.perf_counter()
+            results.append(self._account(await write_batch(collection_name, docs), started))
+        return results
+
+    async def aclose(self) -> dict:
+        self._stop_timer()
+        await self.aflush()
+        _open_writers.discard(self)
+        return self.totals
+
+    def close(self) -> dict:
+        """Flush what is left and return the running totals."""
+        self.flush()
+        _open_writers.discard(self)
+        return self.totals
+
+@atexit.register
+def _flush_open_writers():
+    for writer in list(_open_writers):
+        writer.close()
 
 # --- Connection Cleanup ---
 def close_connection():
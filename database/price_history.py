@@ -0,0 +1,69 @@
+from datetime import datetime
+from config.settings import HISTORY_COLLECTION
+from database.mongo_handler import db, ensure_history_collection
+
+# Points are written by BulkProductWriter / upsert_product; this module reads them back.
+_PROJECTION = {"_id": 0, "ts": 1, "meta": 1, "price": 1, "rating": 1, "reviews": 1}
+
+
+def _match(asin: str, start: datetime | None = None, end: datetime | None = None,
+           collection_name: str | None = None) -> dict:
+    query = {"meta.asin": asin}
+    if collection_name:
+        query["meta.collection"] = collection_name
+    if start or end:
+        query["ts"] = {}
+        if start:
+            query["ts"]["$gte"] = start
+        if end:
+            query["ts"]["$lt"] = end
+    return query
+
+
+# ---------- Query Helpers ----------
+def get_history(asin: str, start: datetime | None = None, end: datetime | None = None,
+                collection_name: str | None = None) -> list[dict]:
+    """Every recorded point for `asin` in [start, end), oldest first."""
+    cursor = db[HISTORY_COLLECTION].find(_match(asin, start, end, collection_name), _PROJECTION)
+    return list(cursor.sort("ts", 1))
+
+
+def latest_points(asin: str, n: int = 10, collection_name: str | None = None) -> list[dict]:
+    """The `n` most recent points for `asin`, newest first."""
+    cursor = db[HISTORY_COLLECTION].find(_match(asin, collection_name=collection_name), _PROJECTION)
+    return list(cursor.sort("ts", -1).limit(n))
+
+
+def downsample(asin: str, start: datetime | None = None, end: datetime | None = None,
+               unit: str = "day", bin_size: int = 1, collection_name: str | None = None) -> list[dict]:
+    """
+    One row per `bin_size` x `unit` bucket ("hour", "day", "week", "month"):
+    min / max / average price plus the last rating and review count seen.
+    """
+    pipeline = [
+        {"$match": _match(asin, start, end, collection_name)},
+        {"$sort": {"ts": 1}},
+        {"$group": {
+            "_id": {"$dateTrunc": {"date": "$ts", "unit": unit, "binSize": bin_size}},
+            "price_min": {"$min": "$price"},
+            "price_max": {"$max": "$price"},
+            "price_avg": {"$avg": "$price"},
+            "rating": {"$last": "$rating"},
+            "reviews": {"$last": "$reviews"},
+            "points": {"$sum": 1},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "ts": "$_id", "price_min": 1, "price_max": 1, "price_avg": 1,
+                      "rating": 1, "reviews": 1, "points": 1}},
+    ]
+    return list(db[HISTORY_COLLECTION].aggregate(pipeline))
+
+
+if __name__ == "__main__":
+    import sys
+
+    ensure_history_collection()
+    for asin in sys.argv[1:]:
+        print(f"📈 {asin}")
+        for point in latest_points(asin):
+            print(f"   {point['ts']} | ₹{point.get('price')} | ⭐{point.get('rating')} | Reviews: {point.get('reviews')}")
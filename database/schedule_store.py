@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+from croniter import croniter
+from pymongo import ASCENDING
+from database.async_mongo import get_collection
+
+# Schedules are written by the admin UI: {frequency, time "HH:MM", day "mon", categories, ...}
+# or with an explicit 5-field `cron`. This module keeps a precomputed, indexed
+# `next_run_at` on each one so the scheduler only ever reads what is due.
+# Whatever edits a schedule must set `updated_at` (or call reschedule()) so the
+# next sync notices the change.
+SCHEDULE_COLLECTION = "scrape_schedules"
+SYNC_OVERLAP = timedelta(minutes=1)   # re-read edits this close to the last sync (clock skew between writers)
+
+DAYS = {"mon", "tue", "wed", "thu", "fri", "sat", "sun"}
+
+
+def schedule_collection():
+    return get_collection(SCHEDULE_COLLECTION)
+
+
+async def ensure_schedule_indexes():
+    await schedule_collection().create_index([("next_run_at", ASCENDING)])
+    await schedule_collection().create_index([("updated_at", ASCENDING)])
+
+
+# ---------- Cron ----------
+def cron_for(schedule: dict) -> str:
+    """The cron expression for a schedule document. Raises ValueError for specs we can't read."""
+    if schedule.get("cron"):
+        expression = schedule["cron"].strip()
+    else:
+        frequency = schedule.get("frequency")
+        hh, mm = 0, 0
+        if schedule.get("time"):
+            hh, mm = (int(part) for part in schedule["time"].split(":"))
+
+        if frequency == "hourly":
+            expression = f"{mm} * * * *"
+        elif frequency == "daily":
+            expression = f"{mm} {hh} * * *"
+        elif frequency == "weekly":
+            day = (schedule.get("day") or "").lower()[:3]
+            if day not in DAYS:
+                raise ValueError(f"weekly schedule needs a day, got {schedule.get('day')!r}")
+            expression = f"{mm} {hh} * * {day}"
+        else:
+            raise ValueError(f"unknown frequency {frequency!r}")
+
+    if not croniter.is_valid(expression):
+        raise ValueError(f"invalid cron expression {expression!r}")
+    return expression
+
+
+def next_run_after(schedule: dict, after: datetime) -> datetime:
+    return croniter(cron_for(schedule), after).get_next(datetime)
+
+
+# ---------- Store ----------
+SPEC_FIELDS = ("cron", "frequency", "time", "day")
+
+
+def _spec_state(schedule: dict, now: datetime) -> dict:
+    """next_run_at, plus the cron it came from (the spec's fingerprint) or the reason there is none."""
+    try:
+        return {"next_run_at": next_run_after(schedule, now), "schedule_cron": cron_for(schedule), "schedule_error": None}
+    except ValueError as e:
+        return {"next_run_at": None, "schedule_cron": None, "schedule_error": str(e)}
+
+
+def _out_of_sync(schedule: dict) -> bool:
+    if "next_run_at" not in schedule:
+        return True
+    try:
+        cron = cron_for(schedule)
+    except ValueError as e:
+        return schedule.get("schedule_error") != str(e)
+    # Edited since next_run_at was computed, or parked on an error the edit has fixed
+    return bool(schedule.get("schedule_error")) or schedule.get("schedule_cron") != cron
+
+
+_last_sync = None
+
+
+async def sync_next_runs(now: datetime | None = None) -> int:
+    """
+    (Re)compute next_run_at for schedules that are new (or reset by
+    reschedule()), and for schedules touched since the last sync whose cron
+    no longer matches the stored schedule_cron or that were parked with a
+    schedule_error. Unreadable specs get next_run_at=None plus schedule_error
+    so they stop being retried until the spec changes. Only the first sync in
+    a process reads every schedule. Returns how many schedules were updated.
+    """
+    global _last_sync
+    now = now or datetime.now()
+    if _last_sync is None:
+        query = {}   # first sync in this process: check every schedule once
+    else:
+        query = {"$or": [{"next_run_at": {"$exists": False}}, {"updated_at": {"$gte": _last_sync - SYNC_OVERLAP}}]}
+    updated = 0
+    schedules = schedule_collection()
+    projection = {f: 1 for f in (*SPEC_FIELDS, "next_run_at", "schedule_cron", "schedule_error")}
+    async for schedule in schedules.find(query, projection):
+        if not _out_of_sync(schedule):
+            continue
+        update = _spec_state(schedule, now)
+        if update["schedule_error"]:
+            print(f"⚠️ Schedule {schedule['_id']} can't be scheduled: {update['schedule_error']}")
+        # Guarded on the next_run_at we read, so a concurrent advance() wins and the next sync retries
+        result = await schedules.update_one({"_id": schedule["_id"], "next_run_at": schedule.get("next_run_at")},
+                                            {"$set": update})
+        updated += result.modified_count
+    _last_sync = now   # only once the whole batch went through, so a failed sync is retried in full
+    return updated
+
+
+async def reschedule(schedule_id):
+    """Call after editing a schedule's frequency/time/day/cron: the next sync recomputes its next run."""
+    await schedule_collection().update_one({"_id": schedule_id}, {"$unset": {"next_run_at": "", "schedule_error": ""}})
+
+
+async def due_schedules(now: datetime, limit: int = 100) -> list[dict]:
+    cursor = schedule_collection().find({"next_run_at": {"$lte": now}}).sort("next_run_at", ASCENDING).limit(limit)
+    return await cursor.to_list(None)
+
+
+async def advance(schedule: dict, now: datetime) -> bool:
+    """
+    Move next_run_at past `now`, guarded on the value we read so only one
+    scheduler process advances a given slot. Missed slots are coalesced.
+    """
+    update = _spec_state(schedule, now)
+    result = await schedule_collection().update_one(
+        {"_id": schedule["_id"], "next_run_at": schedule["next_run_at"]},
+        {"$set": update},
+    )
+    return result.modified_count == 1
+
+
+async def earliest_next_run() -> datetime | None:
+    schedule = await schedule_collection().find_one({"next_run_at": {"$ne": None}}, {"next_run_at": 1}, sort=[("next_run_at", ASCENDING)])
+    return schedule["next_run_at"] if schedule else None
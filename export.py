@@ -0,0 +1,80 @@
+# export.py
+"""
+Export a product collection to a file without loading it into memory:
+
+    python export.py mobiles_collection --format csv --compress gzip
+    python export.py mobiles_collection --format parquet --since 2026-01-01
+    python export.py mobiles_collection --watermark-file exports/mobiles.watermark
+
+With --watermark-file the export starts after the watermark stored in the file
+(everything on the first run) and the file is advanced once the export has
+been written, so repeated runs produce incremental exports.
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime
+from config.settings import EXPORT_DIR, EXPORT_BATCH_SIZE
+from database.async_mongo import close_connection
+from database.export import COMPRESSIONS, ENCODERS, current_watermark, export_stream, file_extension
+
+
+def read_watermark(path: str) -> str | None:
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip() or None
+    return None
+
+
+def write_watermark(path: str, watermark: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(watermark)
+    os.replace(tmp, path)
+
+
+async def export_collection(collection_name: str, fmt: str = "jsonl", fields: list[str] | None = None,
+                            since: str | None = None, compression: str | None = None, out: str | None = None,
+                            batch_size: int = EXPORT_BATCH_SIZE) -> dict:
+    """Write one export file and return its stats, including the watermark it covers up to."""
+    until = await current_watermark(collection_name)
+    if out is None:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out = os.path.join(EXPORT_DIR, f"{collection_name}_{stamp}.{file_extension(fmt, compression)}")
+
+    stats = {"collection": collection_name, "path": out, "since": since, "watermark": until or since}
+    tmp = f"{out}.part"
+    with open(tmp, "wb") as f:
+        async for chunk in export_stream(collection_name, fmt, fields, since, until, compression,
+                                         batch_size, stats):
+            f.write(chunk)
+    os.replace(tmp, out)   # a half-written export never appears under the final name
+    return stats
+
+
+async def _main(args):
+    since = args.since or read_watermark(args.watermark_file)
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+    try:
+        stats = await export_collection(args.collection, args.format, fields, since, args.compress,
+                                        args.out, args.batch_size)
+    finally:
+        await close_connection()
+    print(f"📤 Exported {stats['rows']} products from '{args.collection}' to {stats['path']} "
+          f"({stats['bytes'] / 1e6:.1f} MB, {stats['seconds']}s) | since={since} watermark={stats['watermark']}")
+    if args.watermark_file and stats["watermark"]:
+        write_watermark(args.watermark_file, stats["watermark"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a product collection to JSONL, CSV or Parquet")
+    parser.add_argument("collection")
+    parser.add_argument("--format", choices=list(ENCODERS), default="jsonl")
+    parser.add_argument("--fields", help="comma-separated fields (default: the product read API fields)")
+    parser.add_argument("--since", help="only products with last_updated after this value")
+    parser.add_argument("--watermark-file", help="read --since from / store the new watermark in this file")
+    parser.add_argument("--compress", choices=list(COMPRESSIONS))
+    parser.add_argument("--out", help=f"output path (default: {EXPORT_DIR}/<collection>_<timestamp>.<ext>)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    asyncio.run(_main(parser.parse_args()))
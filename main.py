@@ -1,38 +1,67 @@
 import asyncio
-import random
 import json
-from datetime import datetime
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from pymongo import MongoClient
+from datetime import datetime, timedelta
 from bson import ObjectId
-from config.settings import MONGO_URI, DB_NAME
-from scraper.amazon_scraper import scrape_amazon
+from config.settings import EMBEDDED_WORKER, SCHEDULE_TICK, SCHEDULE_DEFAULT_CATEGORIES
+from database.async_mongo import close_connection
+from database.job_queue import JobDeferred, enqueue, ensure_queue_indexes
+from database.schedule_store import (
+    schedule_collection,
+    ensure_schedule_indexes,
+    sync_next_runs,
+    due_schedules,
+    advance,
+    earliest_next_run,
+)
+from scraper.orchestrator import scrape_categories
 from utils.email_notifier import send_failure_email
 
-# ---------------- MongoDB setup ----------------
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-schedule_collection = db["scrape_schedules"]
-
 # ---------------- Helper: Update schedule status ----------------
-def set_schedule_status(schedule_id, is_running=False, status=None, last_run=None):
+async def set_schedule_status(schedule_id, is_running=False, status=None, last_run=None, job_id=None):
+    """With job_id, only update the schedule while that job still holds its run."""
     update_query = {"is_running": is_running, "updated_at": datetime.now()}
     if status:
         update_query["status"] = status
     if last_run:
         update_query["last_run"] = last_run
-
-    schedule_collection.update_one({"_id": ObjectId(schedule_id)}, {"$set": update_query})
+    if not is_running:
+        update_query["running_job"] = None
+
+    query = {"_id": ObjectId(schedule_id)}
+    if job_id is not None:
+        query["running_job"] = job_id
+    result = await schedule_collection().update_one(query, {"$set": update_query})
+    return result.modified_count > 0
+
+
+# ---------------- Helper: Claim schedule (atomic) ----------------
+async def claim_schedule(schedule_id, job_id=None):
+    """
+    Flip is_running False → True in a single find_one_and_update so two workers
+    can never run the same schedule. A retry of the same job may reclaim its own run.
+    Returns None when someone else holds it.
+    """
+    owners = [{"is_running": {"$ne": True}}]
+    if job_id is not None:
+        owners.append({"running_job": job_id})
+    return await schedule_collection().find_one_and_update(
+        {"_id": ObjectId(schedule_id), "$or": owners},
+        {"$set": {"is_running": True, "status": "active", "running_job": job_id, "updated_at": datetime.now()}},
+    )
 
 
 # ---------------- Run Scraper ----------------
-async def run_scrape(schedule):
+async def run_scrape(schedule, job_id=None, categories=None):
+    """
+    Scrape a schedule's categories (or just `categories`, when a deferred job
+    resumes) and return per-category results. Raises if any category failed,
+    and raises JobDeferred when an open circuit breaker held some back.
+    """
     schedule_id = schedule["_id"]
     frequency = schedule.get("frequency")
-    last_run = schedule.get("last_run")
 
     # ---------------- FIX: Convert JSON string → dict ----------------
-    raw_categories = schedule.get("categories")
+    raw_categories = categories or schedule.get("categories")
 
     if isinstance(raw_categories, str):  # when stored as JSON string
         try:
@@ -47,102 +76,115 @@ async def run_scrape(schedule):
     # ---------------------------------------------------------------
     # If categories empty → scrape all default categories
     # ---------------------------------------------------------------
-    ALL_CATEGORIES = {
-        "mobiles": "mobiles_collection",
-        "laptops": "laptops_collection",
-        "shirts": "shirts_collection",
-        "toys": "toys_collection",
-        "sofas": "sofas_collection",
-    }
-
     if not categories:
         print("⚠️ No admin-selected categories found. Scraping ALL categories.")
-        categories = ALL_CATEGORIES
+        categories = SCHEDULE_DEFAULT_CATEGORIES
     else:
         print("✅ Admin-selected categories:", categories)
 
-    # ---------------- Debounce: Limit frequent runs ----------------
-    if last_run:
-        time_since_last = (datetime.now() - last_run).total_seconds()
-        if time_since_last < 10:
-            wait_time = random.randint(10, 20)
-            print(f"⏳ Waiting {wait_time}s due to rate limit")
-            await asyncio.sleep(wait_time)
+    if await claim_schedule(schedule_id, job_id) is None:
+        print(f"⏭️ Schedule '{frequency}' is already running elsewhere; skipping.")
+        return {"skipped": "already running"}
 
     print(f"\n⏱️ Starting scrape for schedule '{frequency}'...")
-    set_schedule_status(schedule_id, is_running=True, status="active")
 
     try:
-        await asyncio.sleep(random.randint(5, 10))  # initial delay
-
         # ---------------- SCRAPE ONLY SELECTED CATEGORIES ----------------
-        for query, collection_name in categories.items():
-            print(f"🔹 Scraping 5 items for category: {query}")
-            scraped = await scrape_amazon(
-                query=query,
-                collection_name=collection_name,
-                max_products=5
+        print(f"🔹 Scraping 5 items each for {len(categories)} categories")
+        results = await scrape_categories(categories, max_products=5)
+
+        failures = [r for r in results.values() if r["status"] not in ("success", "deferred")]
+        if failures:
+            raise Exception("; ".join(f"{r['query']}: {r['error']}" for r in failures))
+
+        deferred = [r for r in results.values() if r["status"] == "deferred"]
+        if deferred:
+            # Amazon is blocking us: come back after the backoff for just these categories
+            raise JobDeferred(
+                "; ".join(f"{r['query']}: {r['error']}" for r in deferred),
+                retry_at=max(r["retry_at"] for r in deferred),
+                payload={"schedule_id": schedule_id, "frequency": frequency,
+                         "categories": {r["query"]: r["collection"] for r in deferred}},
+                result=results,
             )
-            print(f"✅ Scraped {scraped} items for '{collection_name}'")
 
         now = datetime.now()
-        set_schedule_status(schedule_id, is_running=False, status="complete", last_run=now)
+        await set_schedule_status(schedule_id, is_running=False, status="complete", last_run=now)
         print(f"✔️ Scrape complete | Last run: {now.strftime('%I:%M %p')}")
+        return results
+
+    except JobDeferred as e:
+        await set_schedule_status(schedule_id, is_running=False, status="deferred")
+        print(f"⏸️ Scrape deferred until {e.retry_at:%I:%M %p}: {e}")
+        raise
 
     except Exception as e:
-        set_schedule_status(schedule_id, is_running=False, status="failed")
+        # The worker retries the job and sends the failure email once attempts run out
+        await set_schedule_status(schedule_id, is_running=False, status="failed")
         print(f"❌ Scrape failed: {e}")
-        await send_failure_email(str(e), frequency)
+        raise
 
 
 # ---------------- Check Schedules ----------------
-async def check_schedules():
-    now = datetime.now()
-    current_day = now.strftime("%a").lower()
-
-    active_schedules = list(schedule_collection.find({"is_running": False}))
-
-    for schedule in active_schedules:
-        frequency = schedule.get("frequency")
-        schedule_time = schedule.get("time")
-        schedule_day = schedule.get("day")
-        last_run = schedule.get("last_run")
-
-        run = False
-
-        # Hourly
-        if frequency == "hourly":
-            run = True
-
-        # Daily
-        elif frequency == "daily" and schedule_time:
-            hh, mm = schedule_time.split(":")
-            if now.hour == int(hh) and now.minute == int(mm):
-                if not last_run or last_run.date() != now.date():
-                    run = True
-
-        # Weekly
-        elif frequency == "weekly" and schedule_day and schedule_time:
-            hh, mm = schedule_time.split(":")
-            if schedule_day.lower() == current_day:
-                if now.hour == int(hh) and now.minute == int(mm):
-                    if not last_run or last_run.date() != now.date():
-                        run = True
-
-        if run:
-            asyncio.create_task(run_scrape(schedule))
+async def check_schedules(now=None):
+    """
+    Queue every schedule whose next_run_at has passed, then advance it.
+    Only due schedules are read (indexed on next_run_at). A late tick still
+    finds the missed slot, and several missed slots collapse into one run.
+    """
+    now = now or datetime.now()
+    await sync_next_runs(now)
+
+    for schedule in await due_schedules(now):
+        frequency = schedule.get("frequency") or schedule.get("cron")
+        slot = schedule["next_run_at"]
+        if now - slot > timedelta(seconds=SCHEDULE_TICK):
+            print(f"⏰ Catching up missed '{frequency}' run due {slot:%Y-%m-%d %H:%M}")
+
+        # Enqueue before advancing: dedupe_key makes a repeat after a crash harmless
+        job_id = await enqueue(
+            "schedule",
+            {"schedule_id": schedule["_id"], "frequency": frequency},
+            dedupe_key=f"schedule:{schedule['_id']}:{slot:%Y-%m-%dT%H:%M}",
+        )
+        await advance(schedule, now)
+        if job_id:
+            print(f"📥 Queued '{frequency}' schedule {schedule['_id']} as job {job_id}")
+
+
+async def scheduler_loop():
+    """
+    Sleep until the earliest next_run_at (at most SCHEDULE_TICK, so new
+    schedules are noticed, and at least a second, so a schedule left overdue
+    by a failed check doesn't spin the loop).
+    """
+    while True:
+        delay = SCHEDULE_TICK
+        try:
+            await check_schedules()
+            next_run_at = await earliest_next_run()
+            if next_run_at:
+                delay = min(delay, (next_run_at - datetime.now()).total_seconds())
+        except Exception as e:
+            print(f"❌ Schedule check failed: {e}")
+        await asyncio.sleep(max(delay, 1.0))
 
 
 # ---------------- Main Entry ----------------
 async def main():
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(check_schedules, "interval", minutes=1, coalesce=True)
-    scheduler.start()
+    await ensure_queue_indexes()
+    await ensure_schedule_indexes()
+    scheduler = asyncio.create_task(scheduler_loop())
 
-    print("🟢 Scheduler running every 1 minute...")
+    print("🟢 Scheduler running (sleeps until the next due schedule)...")
 
-    while True:
-        await asyncio.sleep(60)
+    try:
+        if EMBEDDED_WORKER:
+            from worker import run_worker
+            await run_worker()
+        await scheduler
+    finally:
+        await close_connection()
 
 
 if __name__ == "__main__":
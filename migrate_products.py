@@ -0,0 +1,134 @@
+# migrate_products.py
+"""
+Fold the per-category product collections (mobiles, mobiles_collection,
+scraped_products, ...) into the canonical PRODUCTS_COLLECTION:
+
+    python migrate_products.py --dry-run
+    python migrate_products.py mobiles_collection laptops_collection
+    python migrate_products.py scraped_products --category scraped_products=Mobile
+
+Every source document becomes (or joins) the one document for its ASIN. The
+newest copy by last_updated provides the product fields, tags are combined,
+and the collection's category is added to `categories`. Sources are left in
+place; drop them once readers have moved over. Safe to run again.
+"""
+import argparse
+import asyncio
+from pymongo import UpdateOne
+from config.settings import CATEGORIES, EXPORT_BATCH_SIZE, PRODUCTS_COLLECTION
+from database.async_mongo import close_connection, ensure_indexes, get_collection, get_db
+from database.mongo_handler import (
+    HASH_FIELDS,
+    MEMBERSHIP_FIELDS,
+    category_key,
+    content_hash,
+    product_update,
+)
+from backend.products_api import NON_PRODUCT_COLLECTIONS
+
+LEGACY_COLLECTIONS = {collection: query for query, collection in CATEGORIES.items()}
+
+
+def source_category(collection_name: str) -> str | None:
+    """Category a legacy collection held, or None when it mixes categories (read per document)."""
+    if collection_name in LEGACY_COLLECTIONS:
+        return LEGACY_COLLECTIONS[collection_name]
+    if collection_name.endswith("_collection"):
+        return collection_name[: -len("_collection")]
+    return None
+
+
+def document_category(doc: dict) -> str | None:
+    # amazon.py stored the admin category as the only tag
+    return doc.get("category") or (doc.get("tags") or [None])[0]
+
+
+async def product_collections() -> list[str]:
+    """Collections with the unique asin index, apart from the canonical one."""
+    names = []
+    for name in sorted(await get_db().list_collection_names()):
+        if name == PRODUCTS_COLLECTION or name in NON_PRODUCT_COLLECTIONS or name.startswith("system."):
+            continue
+        indexes = await get_collection(name).index_information()
+        if any(spec.get("key") == [("asin", 1)] for spec in indexes.values()):
+            names.append(name)
+    return names
+
+
+def migration_op(doc: dict, existing: dict | None, category: str | None) -> tuple[UpdateOne, dict]:
+    """The upsert folding `doc` into the canonical product, and the product as it will be stored."""
+    fields = {k: v for k, v in doc.items() if k not in ("_id", *MEMBERSHIP_FIELDS)}
+    tags = list(dict.fromkeys([*((existing or {}).get("tags") or []), *(fields.get("tags") or [])]))
+    newer = existing is None or (doc.get("last_updated") or "") > (existing.get("last_updated") or "")
+    product = {**(fields if newer else existing), "tags": tags}
+    product["content_hash"] = content_hash(product)
+    update_fields = {**fields, "tags": tags, "content_hash": product["content_hash"]} if newer else \
+        {"tags": tags, "content_hash": product["content_hash"]}
+    categories = list(dict.fromkeys([*([category_key(category)] if category else []), *(doc.get("categories") or [])]))
+    ranks = (doc.get("ranks") or {}) if newer else {}
+    # The legacy tags were that category's classification; later scrapes of it replace them
+    category_tags = {category_key(category): fields.get("tags") or []} if category else {}
+    update = product_update(categories, ranks, update_fields, category_tags)
+    return UpdateOne({"asin": doc["asin"]}, update, upsert=True), product
+
+
+async def migrate_collection(name: str, category: str | None = None, batch_size: int = EXPORT_BATCH_SIZE,
+                             dry_run: bool = False) -> dict:
+    category = category or source_category(name)
+    stats = {"collection": name, "category": category or "per document", "documents": 0,
+             "new": 0, "merged": 0, "skipped": 0}
+    target = get_collection(PRODUCTS_COLLECTION)
+    projection = {"_id": 0, "asin": 1, "last_updated": 1, **{f: 1 for f in HASH_FIELDS}}
+
+    async def flush(batch):
+        asins = [d["asin"] for d in batch]
+        existing = {d["asin"]: d async for d in target.find({"asin": {"$in": asins}}, projection)}
+        ops = []
+        for doc in batch:
+            stats["merged" if doc["asin"] in existing else "new"] += 1
+            op, existing[doc["asin"]] = migration_op(doc, existing.get(doc["asin"]), category or document_category(doc))
+            ops.append(op)   # a later copy in the same batch merges into the product as updated here
+        if ops and not dry_run:
+            await target.bulk_write(ops, ordered=True)   # same-ASIN ops must apply in order
+
+    batch = []
+    async for doc in get_collection(name).find({}, batch_size=batch_size):
+        stats["documents"] += 1
+        if not (doc.get("asin") and doc.get("title")):
+            stats["skipped"] += 1
+            continue
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    print(f"{'🔍' if dry_run else '✅'} {name} → {PRODUCTS_COLLECTION} | category={stats['category']} "
+          f"documents={stats['documents']} new={stats['new']} merged={stats['merged']} skipped={stats['skipped']}")
+    return stats
+
+
+async def _main(args):
+    overrides = dict(pair.split("=", 1) for pair in args.category or [])
+    try:
+        if not args.dry_run:
+            await ensure_indexes(PRODUCTS_COLLECTION)
+        names = args.collections or await product_collections()
+        if not names:
+            print("Nothing to migrate.")
+        for name in names:
+            await migrate_collection(name, overrides.get(name), args.batch_size, args.dry_run)
+        if names and not args.dry_run:
+            print(f"Sources were left in place; drop them once nothing reads them: {', '.join(names)}")
+    finally:
+        await close_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"Merge per-category product collections into '{PRODUCTS_COLLECTION}'")
+    parser.add_argument("collections", nargs="*", help="source collections (default: every product collection)")
+    parser.add_argument("--category", action="append", metavar="COLLECTION=CATEGORY",
+                        help="category for a source collection (default: derived from its name)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="count what would be merged without writing")
+    asyncio.run(_main(parser.parse_args()))
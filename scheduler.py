@@ -3,7 +3,9 @@ from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
-from scraper.amazon_scraper import scrape_amazon  # your async scrape function
+from scraper.orchestrator import scrape_categories
+from scraper.browser_pool import browser_pool
+from database.async_mongo import close_connection
 from config.settings import CATEGORIES  # dictionary of queries and collections
 
 # Initialize the scheduler
@@ -15,13 +17,16 @@ async def scrape_all():
     """
     print(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting scheduled scrape...\n")
 
-    for query, collection in CATEGORIES.items():
-        print(f"→ Scraping '{query}' into '{collection}' collection")
-        try:
-            await scrape_amazon(query, collection_name=collection, max_pages=5)
-            print(f"✓ Finished scraping '{query}'\n")
-        except Exception as e:
-            print(f"❌ Error scraping '{query}': {e}\n")
+    try:
+        results = await scrape_categories(CATEGORIES, max_products=None, max_pages=5)
+        for query, result in results.items():
+            if result["status"] == "success":
+                print(f"✓ Finished scraping '{query}' into '{result['collection']}'")
+            else:
+                print(f"❌ Error scraping '{query}': {result['error']}")
+    finally:
+        await browser_pool.close()  # browsers are bound to this asyncio.run loop
+        await close_connection()   # so is the async Mongo client
 
     print(f"✅ All scraping tasks completed successfully at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}!\n")
 
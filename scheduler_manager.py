@@ -4,7 +4,9 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
-from scraper.amazon_scraper import scrape_amazon
+from scraper.orchestrator import scrape_categories
+from scraper.browser_pool import browser_pool
+from database.async_mongo import close_connection
 from config.settings import CATEGORIES
 
 scheduler = BackgroundScheduler()
@@ -13,9 +15,13 @@ scheduler.start()  # Start in background
 # --- Async scraping task ---
 async def scrape_all():
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Starting scraping...")
-    for query, collection in CATEGORIES.items():
-        await scrape_amazon(query, collection_name=collection, max_pages=5)
-        print(f"✓ Finished scraping {query}")
+    try:
+        results = await scrape_categories(CATEGORIES, max_products=None, max_pages=5)
+        for query, result in results.items():
+            print(f"✓ Finished scraping {query} ({result['status']})")
+    finally:
+        await browser_pool.close()  # browsers are bound to this asyncio.run loop
+        await close_connection()   # so is the async Mongo client
     print("✅ All scraping tasks completed!\n")
 
 def run_scraper_job():
@@ -1,157 +1,159 @@
 import asyncio
-import random
-import re
-from datetime import datetime
-from playwright.async_api import async_playwright
-from config.settings import SEARCH_URL, HEADLESS
-from database.mongo_handler import upsert_product, ensure_indexes
+from contextlib import aclosing
+from urllib.parse import urljoin
+from config.settings import SEARCH_URL, RESOURCE_BLOCKING, ENRICH_DETAILS
+from database.mongo_handler import BulkProductWriter, product_collection
+from database.async_mongo import clear_stale_ranks, ensure_indexes
+from scraper.browser_pool import browser_pool
+from scraper.enrichment import enrich_products
+from scraper.interception import install_resource_blocking
+from scraper.extractors import extract_cards
+from scraper.parsers import CARD_SELECTORS, NEXT_PAGE_SELECTOR, build_record
+from scraper.page_load import load_results_page
+from scraper.taxonomy import tag_classifier
+from utils.timing import timed, count
+
+NEXT_HREF_JS = "links => links.length ? links[0].getAttribute('href') : null"
 
 # ---------- Helper: classify tags ----------
 def classify_tags(query: str, title: str | None) -> list[str]:
-    q = (query or "").lower()
-    t = (title or "").lower()
-    if "mobile" in q or "phone" in t:
-        return ["mobile", "electronics"]
-    if "laptop" in q or "laptop" in t:
-        return ["laptop", "electronics"]
-    if "toy" in q or "toy" in t:
-        return ["toys", "kids"]
-    if "sofa" in q or "couch" in t:
-        return ["sofa", "furniture"]
-    if "shirt" in q or "tshirt" in t or "top" in t:
-        return ["shirt", "fashion"]
-    return [q]
+    """Taxonomy tags for a product (see scraper/taxonomy.py); the query itself when nothing matches."""
+    return tag_classifier.classify(title, query)
+
+# ---------- Page Loading ----------
+async def _load_results(page, url: str, query: str) -> str:
+    """Navigate `page` to a results URL and return the card selector that matched."""
+    print(f"🔎 Navigating to {url}")
+    return await load_results_page(page, url, CARD_SELECTORS, query, wait_until="domcontentloaded")
+
+# ---------- Pagination ----------
+async def iter_products(query="mobile", max_pages=1, crawl: dict | None = None):
+    """
+    Yield ProductRecords across up to `max_pages` result pages, following
+    the SERP "next" link. While the caller consumes page N, page N+1 is
+    already loading in a second tab of the same context. `crawl["complete"]`
+    (if given) is set once every product up to the end of the listing was yielded.
+
+    Wrap in contextlib.aclosing() when stopping early so the prefetch is
+    cancelled and the tabs go back to the pool.
+    """
+    tabs = 2 if max_pages > 1 else 1
+    # Picks a healthy identity for the host, or raises CircuitOpen before any tab is leased
+    async with browser_pool.pages(tabs, SEARCH_URL.format(query=query)) as pages:
+        block_stats = [await install_resource_blocking(p, query) if RESOURCE_BLOCKING else None for p in pages]
+        page_marks = [None] * tabs   # each tab's stats as its current page started loading
+
+        def start_load(tab_index: int, url: str):
+            if block_stats[tab_index]:
+                page_marks[tab_index] = block_stats[tab_index].copy()
+            return asyncio.create_task(_load_results(pages[tab_index], url, query))
+
+        current = 0
+        load = start_load(0, SEARCH_URL.format(query=query))
+        page_number = 1
+
+        try:
+            while load is not None:
+                tab = pages[current]
+                try:
+                    found_selector = await load
+                except Exception as e:
+                    if page_number == 1:
+                        raise
+                    print(f"⚠️ Stopping at page {page_number} for '{query}': {e}")
+                    return
+                load = None
+
+                with timed("extraction"):
+                    records = await extract_cards(tab, found_selector)
+                    next_href = await tab.eval_on_selector_all(NEXT_PAGE_SELECTOR, NEXT_HREF_JS)
+                if block_stats[current]:
+                    print(f"🧹 Request filter: {block_stats[current].since(page_marks[current]).summary()}")
+                print(f"📦 Page {page_number}: found {len(records)} products for '{query}'")
+
+                # Start loading the next page before handing this one to the caller
+                if next_href and page_number < max_pages:
+                    current = (current + 1) % tabs
+                    load = start_load(current, urljoin(tab.url, next_href))
+
+                for record in records:
+                    product = build_record(record)
+                    if product is None:
+                        count("products_skipped")
+                        continue
+                    yield product
+                page_number += 1
+            if crawl is not None:
+                crawl["complete"] = not next_href   # False when max_pages cut the listing short
+        finally:
+            if load is not None and not load.done():
+                load.cancel()
 
 # ---------- Core Scraper ----------
-async def scrape_amazon(query="mobile", collection_name="products", max_products=5):
+async def scrape_amazon(query="mobile", collection_name="products", max_products=5, max_pages=1, writer=None,
+                        on_product=None, enrich=ENRICH_DETAILS):
     """
     Scrape Amazon search results for a given query and save products in MongoDB.
+    Reads up to `max_pages` result pages; `max_products=None` keeps every product.
+    Pass a shared BulkProductWriter as `writer` to batch writes across
+    scrapes; otherwise a private writer is flushed before returning.
+    `on_product(doc)` is called for every product as soon as it is queued.
+    `enrich=True` then fetches detail pages for products without fresh detail data.
+    With UNIFIED_PRODUCTS the products go to the canonical collection instead
+    of `collection_name`, tagged with `query` as a category and their rank in it.
     """
-    ensure_indexes(collection_name)  # ensure unique index on ASIN
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=HEADLESS,
-            args=["--no-sandbox", "--disable-blink-features=AutomationControlled"]
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                       "(KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36"
-        )
-        page = await context.new_page()
-        url = SEARCH_URL.format(query=query)
-
-        print(f"🔎 Navigating to {url}")
-        await page.goto(url, timeout=60000, wait_until="domcontentloaded")
-        await page.wait_for_timeout(4000)
-
-        # Try multiple selectors
-        selectors = [
-            "div.s-main-slot div[data-component-type='s-search-result']",
-            "div[data-asin][data-component-type='s-search-result']",
-        ]
-
-        found_selector = None
-        for selector in selectors:
+    collection_name = product_collection(collection_name)
+    await ensure_indexes(collection_name, [query])  # unique ASIN + listing indexes, incl. this query's ranks
+    await tag_classifier.refresh()         # pick up taxonomy edits (Mongo source only)
+    own_writer = writer is None
+    writer = writer or BulkProductWriter()
+    scraped_count = 0
+    asins = []
+    crawl = {"complete": False}
+
+    try:
+        async with aclosing(iter_products(query, max_pages, crawl)) as products:
+            async for product in products:
+                if max_products and scraped_count >= max_products:
+                    break
+
+                try:
+                    product_doc = {
+                        **product.as_doc(),
+                        "tags": classify_tags(query, product.title),
+                        "query": query,
+                        "category": query,
+                        "rank": scraped_count + 1,
+                    }
+
+                    await writer.aadd(product_doc, collection_name)
+                    scraped_count += 1
+                    asins.append(product.asin)
+                    count("products_scraped")
+                    if on_product:
+                        on_product(product_doc)
+                    print(f"🛒 [{scraped_count}/{max_products or '∞'}] {product.title[:80]} | ₹{product.price if product.price else 'N/A'}")
+
+                except Exception as e:
+                    count("products_failed")
+                    print(f"⚠️ Error storing product: {e}")
+
+        if asins:
+            # Ranks are positions in this listing: a full crawl retires every rank it didn't see,
+            # a partial one only the positions it covered
+            cleared = await clear_stale_ranks(collection_name, query, asins,
+                                              None if crawl["complete"] else scraped_count)
+            if cleared:
+                print(f"🧹 Cleared '{query}' rank from {cleared} products no longer listed")
+
+        if enrich and asins:
+            await writer.aflush()  # detail data is attached to stored products
             try:
-                await page.wait_for_selector(selector, timeout=30000)
-                found_selector = selector
-                break
-            except Exception:
-                continue
-
-        if not found_selector:
-            await page.screenshot(path=f"debug_{query}.png")
-            html = await page.content()
-            if "robot" in html.lower() or "captcha" in html.lower():
-                print("🚫 Amazon blocked the scraper (CAPTCHA or Bot detection).")
-            raise Exception("Product list selector not found.")
-
-        products = await page.query_selector_all(found_selector)
-        print(f"📦 Found {len(products)} products for '{query}'")
-
-        scraped_count = 0
-
-        for product in products:
-            if scraped_count >= max_products:
-                break
-
-            try:
-                asin = await product.get_attribute("data-asin")
-                if not asin:
-                    continue
-
-                # TITLE
-                title_el = await product.query_selector("h2 span")
-                title = (await title_el.inner_text()).strip() if title_el else None
-                if not title:
-                    continue
-
-                # PRICE
-                price = None
-                price_el = await product.query_selector("span.a-price > span.a-offscreen")
-                if price_el:
-                    price_text = (await price_el.inner_text()).replace("₹", "").replace(",", "").strip()
-                    try:
-                        price = float(price_text)
-                    except ValueError:
-                        pass
-
-                # RATING
-                rating = None
-                rating_el = await product.query_selector("span.a-icon-alt")
-                if rating_el:
-                    m = re.search(r"[\d.]+", await rating_el.inner_text())
-                    if m:
-                        rating = float(m.group(0))
-
-                # REVIEWS
-                reviews = 0
-                review_el = await product.query_selector("span.a-size-base.s-underline-text")
-                if review_el:
-                    m = re.search(r"[\d,]+", await review_el.inner_text())
-                    if m:
-                        reviews = int(m.group(0).replace(",", ""))
-
-                # IMAGE
-                img_el = await product.query_selector("img.s-image")
-                image_url = await img_el.get_attribute("src") if img_el else None
-
-                # PRODUCT LINK
-                link_el = await product.query_selector("h2 a")
-                product_url = None
-                if link_el:
-                    href = await link_el.get_attribute("href")
-                    if href and not href.startswith("http"):
-                        href = "https://www.amazon.in" + href.split("?")[0]
-                    product_url = href
-
-                # BRAND + TAGS
-                brand = title.split()[0] if title else "Unknown"
-                tags = classify_tags(query, title)
-
-                product_doc = {
-                    "asin": asin,
-                    "title": title,
-                    "price": price,
-                    "rating": rating,
-                    "reviews": reviews,
-                    "image_url": image_url,
-                    "product_url": product_url,
-                    "tags": tags,
-                    "brand": brand,
-                    "query": query,
-                }
-
-                upsert_product(product_doc, collection_name)
-                scraped_count += 1
-                print(f"🛒 [{scraped_count}/{max_products}] {title[:80]} | ₹{price if price else 'N/A'}")
-
-                await asyncio.sleep(random.uniform(5, 10))  # rate-limit
-
+                await enrich_products(asins, collection_name)
             except Exception as e:
-                print(f"⚠️ Error parsing product: {e}")
-
-        await browser.close()
-        print(f"✅ Completed scraping {scraped_count} products for '{query}'")
-        return scraped_count
+                print(f"⚠️ Enrichment failed for '{query}': {e}")
+    finally:
+        if own_writer:
+            await writer.aclose()   # also on failure/cancel: flushes what was queued and stops its timer
+    print(f"✅ Completed scraping {scraped_count} products for '{query}'")
+    return scraped_count
@@ -0,0 +1,212 @@
+import asyncio
+from contextlib import asynccontextmanager
+import psutil
+from playwright.async_api import async_playwright
+from utils.timing import count
+from scraper.identities import identity_pool, Identity
+from config.settings import (
+    HEADLESS,
+    BROWSER_ARGS,
+    BROWSER_POOL_SIZE,
+    BROWSER_MAX_PAGES,
+    BROWSER_MAX_MEMORY_MB,
+)
+
+
+# ---------- Pooled Browser ----------
+class PooledBrowser:
+    """A warm Chromium instance with one long-lived context per browser identity."""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.contexts = {}   # identity name -> [context, identity generation, leased pages]
+        self.pages_served = 0
+        self.active_pages = 0
+        self.retiring = False
+        self._context_lock = asyncio.Lock()   # two leases must not both create an identity's context
+
+    @property
+    def alive(self) -> bool:
+        return self.browser.is_connected() and not self.retiring
+
+    async def lease_context(self, identity: Identity, count: int):
+        """The identity's context (made on first use, remade after the identity was rested)."""
+        async with self._context_lock:
+            entry = self.contexts.get(identity.name)
+            if entry and entry[1] != identity.generation and not entry[2]:
+                await self._close_context(identity.name)
+                entry = None
+            if entry is None:
+                generation = identity.generation
+                context = await self.browser.new_context(**identity.context_options())
+                entry = self.contexts[identity.name] = [context, generation, 0]
+            entry[2] += count
+            return entry[0]
+
+    async def return_context(self, identity: Identity, count: int):
+        entry = self.contexts.get(identity.name)
+        if entry is None:
+            return
+        entry[2] -= count
+        try:
+            identity_pool.save_state(identity, await entry[0].storage_state(), entry[1])
+        except Exception as e:
+            print(f"⚠️ Could not save storage state for identity {identity.name}: {e}")
+
+    async def _close_context(self, name: str):
+        entry = self.contexts.pop(name, None)
+        if entry is not None:
+            try:
+                await entry[0].close()
+            except Exception:
+                pass
+
+    async def close(self):
+        for name in list(self.contexts):
+            await self._close_context(name)
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+
+
+# ---------- Browser Pool ----------
+class BrowserPool:
+    """
+    Process-wide pool of warm browsers that leases pages to scrapes.
+
+    Browsers are launched lazily (up to `size`) and reused across scrapes.
+    A browser is recycled once it has served `max_pages` pages or when the
+    Chromium process tree grows past `max_memory_mb`.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES,
+                 max_memory_mb=BROWSER_MAX_MEMORY_MB):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.launches = 0
+        self._playwright = None
+        self._browsers: list[PooledBrowser] = []
+        self._lock = asyncio.Lock()
+        self._loop = None
+        self._page_identities = {}   # leased page -> Identity
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Browsers from a previous event loop (e.g. an earlier asyncio.run) died with it.
+            self._loop = loop
+            self._playwright = None
+            self._browsers = []
+            self._lock = asyncio.Lock()
+            self._page_identities = {}
+
+    async def _launch(self) -> PooledBrowser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        # Chromium only honours per-context proxies when launched with a placeholder one
+        proxy = {"server": "http://per-context"} if identity_pool.needs_proxy_support else None
+        browser = await self._playwright.chromium.launch(headless=HEADLESS, args=BROWSER_ARGS, proxy=proxy)
+        self.launches += 1
+        count("browser_launches")
+        print(f"🚀 Launched pooled browser #{self.launches}")
+        return PooledBrowser(browser)
+
+    async def _acquire(self, count: int = 1) -> PooledBrowser:
+        self._bind_loop()
+        async with self._lock:
+            self._browsers = [b for b in self._browsers if b.alive or b.active_pages]
+            live = [b for b in self._browsers if b.alive]
+            if len(live) < self.size and all(b.active_pages for b in live):
+                pooled = await self._launch()
+                self._browsers.append(pooled)
+            else:
+                pooled = min(live, key=lambda b: b.active_pages)
+            pooled.active_pages += count
+            pooled.pages_served += count
+            return pooled
+
+    async def _release(self, pooled: PooledBrowser, count: int = 1):
+        async with self._lock:
+            pooled.active_pages -= count
+            if pooled.pages_served >= self.max_pages:
+                pooled.retiring = True
+            elif self._memory_mb() > self.max_memory_mb:
+                # Retire the busiest browser first; its renderers hold the most memory.
+                busiest = max((b for b in self._browsers if b.alive), key=lambda b: b.pages_served, default=None)
+                if busiest:
+                    busiest.retiring = True
+            idle_retired = [b for b in self._browsers if b.retiring and not b.active_pages]
+            self._browsers = [b for b in self._browsers if b not in idle_retired]
+        for b in idle_retired:
+            print(f"♻️ Recycling browser after {b.pages_served} pages")
+            await b.close()
+
+    @staticmethod
+    def _memory_mb() -> float:
+        """Resident memory of every child process (Chromium + Playwright driver)."""
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    @asynccontextmanager
+    async def page(self, url: str | None = None, identity: Identity | None = None):
+        """Lease a fresh page from a warm browser context."""
+        async with self.pages(1, url, identity) as pages:
+            yield pages[0]
+
+    @asynccontextmanager
+    async def pages(self, count: int, url: str | None = None, identity: Identity | None = None):
+        """
+        Lease `count` tabs that share one warm browser context (cookies included).
+        The context belongs to `identity`, or to one the identity pool picks for
+        `url` (raises CircuitOpen when every identity is blocked or resting).
+        """
+        identity = identity or (identity_pool.choose(url) if url else identity_pool.choose())
+        pooled = await self._acquire(count)
+        pages = []
+        leased = False
+        try:
+            context = await pooled.lease_context(identity, count)
+            leased = True
+            for _ in range(count):
+                page = await context.new_page()
+                pages.append(page)
+                self._page_identities[page] = identity
+            yield pages
+        finally:
+            for page in pages:
+                self._page_identities.pop(page, None)
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            if leased:
+                await pooled.return_context(identity, count)
+            await self._release(pooled, count)
+
+    def identity(self, page) -> Identity | None:
+        """The identity whose context a leased page belongs to."""
+        return self._page_identities.get(page)
+
+    async def close(self):
+        """Close every browser and stop Playwright (call on shutdown)."""
+        self._bind_loop()
+        async with self._lock:
+            browsers, self._browsers = self._browsers, []
+            for b in browsers:
+                await b.close()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+        if browsers:
+            print(f"🛑 Browser pool closed ({len(browsers)} browser(s))")
+
+
+# Shared pool used by every scrape in this process
+browser_pool = BrowserPool()
@@ -0,0 +1,157 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from config.settings import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BACKOFF_BASE, CIRCUIT_BACKOFF_MAX
+from utils.timing import count
+
+DEFAULT_IDENTITY = "default"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of sending a request while a host/identity circuit is open."""
+
+    def __init__(self, host: str, identity: str, retry_in: float):
+        self.host = host
+        self.identity = identity
+        self.retry_in = retry_in
+        self.retry_at = datetime.now() + timedelta(seconds=retry_in)
+        super().__init__(f"Circuit open for {host} ({identity}); retry in {retry_in:.0f}s")
+
+
+class _Circuit:
+    def __init__(self, backoff: float):
+        self.state = "closed"      # closed -> open -> half_open -> closed | open
+        self.failures = 0          # consecutive block signals while closed
+        self.backoff = backoff
+        self.retry_at = 0.0        # monotonic time the next probe is allowed
+        self.probing = False       # a half-open probe is in flight
+        self.trips = 0
+        self.last_block = None
+
+
+# ---------- Circuit Breaker ----------
+class CircuitBreaker:
+    """
+    Shared breaker keyed by (host, identity).
+
+    `threshold` block signals in a row open the circuit: check() then raises
+    CircuitOpen until the backoff has passed. After that, one request is let
+    through as a half-open probe. If the probe gets through, the circuit
+    closes. If it is blocked again, the circuit reopens with double the
+    backoff, up to `max_backoff`.
+    """
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, base_backoff=CIRCUIT_BACKOFF_BASE,
+                 max_backoff=CIRCUIT_BACKOFF_MAX):
+        self.threshold = threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._circuits: dict[tuple[str, str], _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, url: str, identity: str) -> tuple[tuple[str, str], _Circuit]:
+        key = (urlparse(url).netloc or url, identity)
+        if key not in self._circuits:
+            self._circuits[key] = _Circuit(self.base_backoff)
+        return key, self._circuits[key]
+
+    def check(self, url: str, identity: str = DEFAULT_IDENTITY):
+        """Raise CircuitOpen unless a request to `url` with `identity` may go out now."""
+        with self._lock:
+            (host, _), circuit = self._circuit(url, identity)
+            if circuit.state == "closed":
+                return
+            now = time.monotonic()
+            if circuit.state == "open" and now >= circuit.retry_at:
+                circuit.state = "half_open"
+            if circuit.state == "half_open" and not circuit.probing:
+                circuit.probing = True
+                print(f"🔌 Circuit half-open for {host} ({identity}): sending one probe")
+                return
+            count("circuit_rejections")
+            raise CircuitOpen(host, identity, max(0.0, circuit.retry_at - now) or self.base_backoff)
+
+    def precheck(self, url: str, identity: str = DEFAULT_IDENTITY):
+        """Like check() but never takes the probe slot: fail fast before leasing browsers."""
+        with self._lock:
+            (host, _), circuit = self._circuit(url, identity)
+            now = time.monotonic()
+            waiting = circuit.state == "open" and now < circuit.retry_at
+            if waiting or (circuit.state == "half_open" and circuit.probing):
+                raise CircuitOpen(host, identity, max(0.0, circuit.retry_at - now) or self.base_backoff)
+
+    def record_success(self, url: str, identity: str = DEFAULT_IDENTITY):
+        with self._lock:
+            (host, _), circuit = self._circuit(url, identity)
+            if circuit.state != "closed":
+                print(f"🟢 Circuit closed for {host} ({identity})")
+            circuit.state = "closed"
+            circuit.failures = 0
+            circuit.probing = False
+            circuit.backoff = self.base_backoff
+
+    def record_block(self, url: str, identity: str = DEFAULT_IDENTITY):
+        with self._lock:
+            (host, _), circuit = self._circuit(url, identity)
+            circuit.last_block = datetime.now()
+            if circuit.state == "half_open":
+                circuit.backoff = min(self.max_backoff, circuit.backoff * 2)
+                self._open(host, identity, circuit)
+            elif circuit.state == "closed":
+                circuit.failures += 1
+                if circuit.failures >= self.threshold:
+                    self._open(host, identity, circuit)
+
+    def record_inconclusive(self, url: str, identity: str = DEFAULT_IDENTITY):
+        """A probe that neither got through nor was blocked (e.g. a timeout): retry after the same backoff."""
+        with self._lock:
+            (host, _), circuit = self._circuit(url, identity)
+            if circuit.state == "half_open":
+                self._open(host, identity, circuit)
+
+    def release(self, url: str, identity: str = DEFAULT_IDENTITY):
+        """Give back a probe slot taken by check() for a request that was cancelled or never sent."""
+        with self._lock:
+            _, circuit = self._circuit(url, identity)
+            if circuit.state == "half_open":
+                circuit.probing = False
+
+    def record(self, url: str, outcome: str | None, identity: str = DEFAULT_IDENTITY):
+        """Report a request's readiness outcome: "ready", "blocked", anything else is inconclusive."""
+        if outcome == "ready":
+            self.record_success(url, identity)
+        elif outcome == "blocked":
+            self.record_block(url, identity)
+        else:
+            self.record_inconclusive(url, identity)
+
+    def _open(self, host: str, identity: str, circuit: _Circuit):
+        circuit.state = "open"
+        circuit.probing = False
+        circuit.failures = 0
+        circuit.retry_at = time.monotonic() + circuit.backoff
+        circuit.trips += 1
+        count("circuit_trips")
+        print(f"⛔ Circuit open for {host} ({identity}) for {circuit.backoff:.0f}s")
+
+    def snapshot(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "host": host,
+                    "identity": identity,
+                    "state": c.state,
+                    "consecutive_blocks": c.failures,
+                    "backoff": c.backoff,
+                    "retry_in": round(max(0.0, c.retry_at - now), 1) if c.state != "closed" else 0.0,
+                    "trips": c.trips,
+                    "last_block": c.last_block,
+                }
+                for (host, identity), c in self._circuits.items()
+            ]
+
+
+# Shared breaker used by every scrape in this process
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,118 @@
+# scraper/enrichment.py
+
+import asyncio
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
+from pymongo import UpdateOne
+from config.settings import SEARCH_URL, RESOURCE_BLOCKING, DETAIL_TABS, DETAIL_TTL
+from database.async_mongo import get_collection
+from database.mongo_handler import HASH_FIELDS, content_hash, now_stamp
+from scraper.browser_pool import browser_pool
+from scraper.circuit_breaker import CircuitOpen
+from scraper.interception import install_resource_blocking
+from scraper.parsers import parse_detail_html, DETAIL_READY_SELECTOR
+from scraper.page_load import load_page
+from scraper.rate_limiter import rate_limiter
+from scraper.readiness import capture_debug
+from utils.timing import timed, count
+
+
+def detail_url(asin: str) -> str:
+    # Same host as the search page, so the benchmark fixture server serves these too
+    return urljoin(SEARCH_URL, f"/dp/{asin}")
+
+
+async def stale_asins(collection_name: str, asins: list[str], ttl: float = DETAIL_TTL) -> list[str]:
+    """The ASINs whose detail data is missing or older than `ttl` seconds."""
+    cutoff = datetime.now() - timedelta(seconds=ttl)
+    cursor = get_collection(collection_name).find(
+        {"asin": {"$in": asins}, "detail_scraped_at": {"$gte": cutoff}}, {"_id": 0, "asin": 1})
+    fresh = {d["asin"] async for d in cursor}
+    return [a for a in dict.fromkeys(asins) if a not in fresh]
+
+
+async def fetch_detail(page, asin: str) -> dict | None:
+    """Load one /dp/ page and parse it offline. None when blocked or not a product page."""
+    url = detail_url(asin)
+    readiness = await load_page(page, url, [DETAIL_READY_SELECTOR], timeout=15,
+                                phases=("detail_navigation", "detail_wait"))
+    if readiness.state == "throttled":
+        print(f"⚠️ Detail page for {asin} throttled ({readiness.match})")
+        return None
+    detail = None
+    if readiness.ready:
+        with timed("detail_extraction"):
+            detail = parse_detail_html(await page.content())
+    else:
+        await capture_debug(page, f"dp_{asin}")
+    if detail is None:
+        rate_limiter.report_throttled(url)
+        count("detail_failures")
+        print(f"⚠️ No product detail for {asin} (blocked or missing page)")
+        return None
+    rate_limiter.report_success(url)
+    count("details_fetched")
+    return detail
+
+
+def _detail_update(asin: str, detail: dict, stored: dict | None) -> UpdateOne:
+    fields = {"detail": detail, "detail_scraped_at": datetime.now(), "last_updated": now_stamp()}
+    if detail.get("brand"):
+        fields["brand"] = detail["brand"]
+        if stored is not None:
+            # Keep content_hash in step so the next SERP pass doesn't count this as a change
+            fields["content_hash"] = content_hash({**stored, "brand": detail["brand"]})
+    return UpdateOne({"asin": asin}, {"$set": fields})
+
+
+async def enrich_products(asins: list[str], collection_name: str, tabs: int = DETAIL_TABS,
+                          ttl: float = DETAIL_TTL) -> dict:
+    """
+    Fetch detail pages for the stale ASINs in `asins` using `tabs` concurrent
+    tabs of one browser context and store them under `detail` (the real brand
+    also replaces the title guess). Products must already be stored.
+    """
+    stats = {"requested": len(asins), "fresh": 0, "fetched": 0, "failed": 0}
+    todo = await stale_asins(collection_name, asins, ttl)
+    stats["fresh"] = len(set(asins)) - len(todo)
+    if not todo:
+        return stats
+
+    queue = asyncio.Queue()
+    for asin in todo:
+        queue.put_nowait(asin)
+    details = {}
+
+    async def drain(page):
+        if RESOURCE_BLOCKING:
+            await install_resource_blocking(page)
+        while not queue.empty():
+            asin = queue.get_nowait()
+            try:
+                detail = await fetch_detail(page, asin)
+            except CircuitOpen as e:
+                print(f"⏸️ Enrichment paused: {e}")
+                return
+            except Exception as e:
+                print(f"⚠️ Detail fetch failed for {asin}: {e}")
+                detail = None
+            if detail is None:
+                stats["failed"] += 1
+            else:
+                details[asin] = detail
+
+    print(f"🔍 Enriching {len(todo)} products in '{collection_name}' ({stats['fresh']} still fresh)")
+    async with browser_pool.pages(min(tabs, len(todo)), detail_url(todo[0])) as pages:
+        await asyncio.gather(*(drain(page) for page in pages))
+
+    if details:
+        collection = get_collection(collection_name)
+        projection = {"_id": 0, "asin": 1, **{f: 1 for f in HASH_FIELDS}}
+        stored = {d["asin"]: d async for d in collection.find({"asin": {"$in": list(details)}}, projection)}
+        ops = [_detail_update(asin, detail, stored.get(asin)) for asin, detail in details.items()]
+        with timed("mongo_write"):
+            await collection.bulk_write(ops, ordered=False)
+    stats["fetched"] = len(details)
+    print(f"✅ Enrichment done for '{collection_name}' | fetched={stats['fetched']} "
+          f"fresh={stats['fresh']} failed={stats['failed']}")
+    return stats
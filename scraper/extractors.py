@@ -0,0 +1,62 @@
+import re
+from config.settings import EXTRACTION_MODE
+from scraper.parsers import SEARCH_CARD_FIELDS, parse_cards
+
+# Runs inside the page: one call returns every card's raw fields.
+_EXTRACT_CARDS_JS = """
+(cards, fields) => cards.map((card) => {
+    const record = { asin: card.getAttribute("data-asin") };
+    for (const [name, spec] of Object.entries(fields)) {
+        record[name] = null;
+        const pattern = spec.pattern ? new RegExp(spec.pattern) : null;
+        for (const selector of spec.selectors) {
+            const el = card.querySelector(selector);
+            if (!el) continue;
+            const value = spec.attr ? el.getAttribute(spec.attr) : el.innerText;
+            if (value === null) continue;
+            if (pattern && !pattern.test(value)) continue;
+            record[name] = value;
+            break;
+        }
+    }
+    return record;
+})
+"""
+
+
+# ---------- Extraction ----------
+async def extract_cards(page, card_selector: str, fields: dict = SEARCH_CARD_FIELDS,
+                        mode: str = EXTRACTION_MODE) -> list[dict]:
+    """
+    Return one plain record per result card: {"asin": ..., <field>: raw text/attr or None}.
+
+    mode="evaluate" does a single $$eval round trip for the whole page;
+    mode="html" fetches page.content() once and parses it offline;
+    mode="handles" walks element handles from Python (one IPC call per lookup).
+    """
+    if mode == "html":
+        return parse_cards(await page.content(), fields, [card_selector])
+    if mode == "evaluate":
+        return await page.eval_on_selector_all(card_selector, _EXTRACT_CARDS_JS, fields)
+    if mode == "handles":
+        return [await _extract_card_handle(card, fields) for card in await page.query_selector_all(card_selector)]
+    raise ValueError(f"Unknown extraction mode: {mode}")
+
+
+async def _extract_card_handle(card, fields: dict) -> dict:
+    record = {"asin": await card.get_attribute("data-asin")}
+    for name, spec in fields.items():
+        record[name] = None
+        pattern = re.compile(spec["pattern"]) if spec.get("pattern") else None
+        for selector in spec["selectors"]:
+            el = await card.query_selector(selector)
+            if not el:
+                continue
+            value = await el.get_attribute(spec["attr"]) if spec.get("attr") else await el.inner_text()
+            if value is None:
+                continue
+            if pattern and not pattern.search(value):
+                continue
+            record[name] = value
+            break
+    return record
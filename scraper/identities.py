@@ -0,0 +1,172 @@
+# scraper/identities.py
+
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+from config.settings import (
+    SEARCH_URL,
+    IDENTITIES,
+    IDENTITY_STATE_DIR,
+    IDENTITY_SCORE_DECAY,
+    IDENTITY_LATENCY_TARGET,
+    IDENTITY_MIN_HEALTH,
+    IDENTITY_REST,
+)
+from scraper.circuit_breaker import circuit_breaker, CircuitOpen, DEFAULT_IDENTITY
+from utils.timing import count
+
+
+# ---------- Identity ----------
+class Identity:
+    """One browser persona plus moving averages of how it has been doing lately."""
+
+    CONTEXT_OPTIONS = ("user_agent", "viewport", "locale", "timezone_id", "proxy")
+
+    def __init__(self, name: str, **options):
+        self.name = name
+        self.options = {k: v for k, v in options.items() if k in self.CONTEXT_OPTIONS and v}
+        self.success = 1.0        # share of recent loads that reached a results page
+        self.blocked = 0.0        # share of recent loads answered with a CAPTCHA / block
+        self.latency = None       # seconds to a ready page
+        self.uses = 0
+        self.blocks = 0
+        self.rested_until = 0.0   # monotonic
+        self.rests = 0
+        self.generation = 0       # bumped on rest so browsers drop the old context and cookies
+
+    @property
+    def health(self) -> float:
+        speed = 1.0 if not self.latency else min(1.0, IDENTITY_LATENCY_TARGET / self.latency)
+        return self.success * (1 - self.blocked / 2) * speed
+
+    @property
+    def state_path(self) -> str | None:
+        return os.path.join(IDENTITY_STATE_DIR, f"{self.name}.json") if IDENTITY_STATE_DIR else None
+
+    def context_options(self) -> dict:
+        options = dict(self.options)
+        path = self.state_path
+        if path and os.path.exists(path):
+            options["storage_state"] = path
+        return options
+
+    def observe(self, outcome: str | None, latency: float | None):
+        a = IDENTITY_SCORE_DECAY
+        self.uses += 1
+        self.success = (1 - a) * self.success + a * (outcome == "ready")
+        self.blocked = (1 - a) * self.blocked + a * (outcome == "blocked")
+        if outcome == "blocked":
+            self.blocks += 1
+        if outcome == "ready" and latency is not None:
+            self.latency = latency if self.latency is None else (1 - a) * self.latency + a * latency
+
+
+# ---------- Identity Pool ----------
+class IdentityPool:
+    """
+    Rotates scrapes across browser identities. choose() picks one at random,
+    weighted by health, skipping identities that are resting or whose circuit
+    is open for the host. record() feeds each page load back into both the
+    identity's health and its circuit; an identity whose health falls below
+    `min_health` rests for `rest` seconds and comes back with fresh cookies.
+    """
+
+    def __init__(self, identities: list[dict] = IDENTITIES, min_health: float = IDENTITY_MIN_HEALTH,
+                 rest: float = IDENTITY_REST):
+        self.identities = [Identity(**spec) for spec in identities]
+        if not self.identities:
+            raise ValueError("IDENTITIES must contain at least one identity")
+        self.min_health = min_health
+        self.rest = rest
+        self._lock = threading.Lock()
+
+    @property
+    def needs_proxy_support(self) -> bool:
+        return any("proxy" in i.options for i in self.identities)
+
+    def choose(self, url: str = SEARCH_URL) -> Identity:
+        """A healthy identity for a request to `url`; CircuitOpen when none may go out."""
+        now = time.monotonic()
+        with self._lock:
+            waits, candidates = [], []
+            for identity in self.identities:
+                if identity.rested_until > now:
+                    waits.append(identity.rested_until - now)
+                    continue
+                try:
+                    circuit_breaker.precheck(url, identity.name)
+                except CircuitOpen as e:
+                    waits.append(e.retry_in)
+                    continue
+                candidates.append(identity)
+            if not candidates:
+                count("identity_exhausted")
+                raise CircuitOpen(urlparse(url).netloc or url, "all identities", min(waits))
+            return random.choices(candidates, weights=[max(i.health, 0.01) for i in candidates])[0]
+
+    def check(self, identity: Identity | None, url: str):
+        """circuit_breaker.check() for this identity's circuit (raises CircuitOpen)."""
+        circuit_breaker.check(url, identity.name if identity else DEFAULT_IDENTITY)
+
+    def record(self, identity: Identity | None, url: str, outcome: str | None, latency: float | None = None):
+        """Report a page load's readiness outcome ("ready", "blocked", other = inconclusive)."""
+        circuit_breaker.record(url, outcome, identity.name if identity else DEFAULT_IDENTITY)
+        if identity is None:
+            return
+        with self._lock:
+            identity.observe(outcome, latency)
+            if identity.health < self.min_health and identity.rested_until <= time.monotonic():
+                self._rest(identity)
+
+    def release(self, identity: Identity | None, url: str):
+        """A load that ended without an outcome (cancelled, or never sent): free its probe slot, no health change."""
+        circuit_breaker.release(url, identity.name if identity else DEFAULT_IDENTITY)
+
+    def _rest(self, identity: Identity):
+        identity.rested_until = time.monotonic() + self.rest
+        identity.rests += 1
+        identity.generation += 1
+        # Back on probation after the rest: some traffic, not a full share
+        identity.success, identity.blocked = 0.5, 0.0
+        path = identity.state_path
+        if path and os.path.exists(path):
+            os.remove(path)   # cookies that earned a CAPTCHA aren't worth keeping
+        count("identity_rests")
+        print(f"😴 Resting identity {identity.name} for {self.rest:.0f}s (health below {self.min_health})")
+
+    def save_state(self, identity: Identity, state: dict, generation: int):
+        """Persist a context's cookies/storage, unless the identity was rested since the context was made."""
+        path = identity.state_path
+        if not path or generation != identity.generation:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    def snapshot(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "name": i.name,
+                    "health": round(i.health, 3),
+                    "success": round(i.success, 3),
+                    "blocked": round(i.blocked, 3),
+                    "latency": round(i.latency, 2) if i.latency else None,
+                    "uses": i.uses,
+                    "blocks": i.blocks,
+                    "rests": i.rests,
+                    "resting_for": round(max(0.0, i.rested_until - now), 1),
+                    "proxy": (i.options.get("proxy") or {}).get("server"),
+                }
+                for i in self.identities
+            ]
+
+
+# Shared pool used by every browser context in this process
+identity_pool = IdentityPool()
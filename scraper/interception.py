@@ -0,0 +1,91 @@
+import re
+from collections import Counter
+from config.settings import (
+    BLOCK_RESOURCE_TYPES,
+    BLOCK_URL_PATTERNS,
+    RESOURCE_ALLOWLIST,
+    BLOCKED_BYTES_ESTIMATE,
+)
+
+_BLOCK_URL_RE = re.compile("|".join(BLOCK_URL_PATTERNS)) if BLOCK_URL_PATTERNS else None
+
+
+# ---------- Per-page stats ----------
+class BlockStats:
+    """
+    Requests aborted on one tab, with an estimate of the bytes not downloaded.
+    The counts run for the tab's lifetime; take a copy() before a navigation
+    and report since(copy) to get that page alone.
+    """
+
+    def __init__(self):
+        self.blocked = Counter()
+        self.allowed = 0
+        self.bytes_saved = 0
+
+    def record_block(self, resource_type: str):
+        self.blocked[resource_type] += 1
+        self.bytes_saved += BLOCKED_BYTES_ESTIMATE.get(resource_type, BLOCKED_BYTES_ESTIMATE["default"])
+
+    def copy(self) -> "BlockStats":
+        stats = BlockStats()
+        stats.blocked = Counter(self.blocked)
+        stats.allowed = self.allowed
+        stats.bytes_saved = self.bytes_saved
+        return stats
+
+    def since(self, earlier: "BlockStats | None") -> "BlockStats":
+        """What was blocked/allowed after `earlier` (a copy of these stats) was taken."""
+        if earlier is None:
+            return self
+        stats = BlockStats()
+        stats.blocked = self.blocked - earlier.blocked
+        stats.allowed = self.allowed - earlier.allowed
+        stats.bytes_saved = self.bytes_saved - earlier.bytes_saved
+        return stats
+
+    def summary(self) -> str:
+        total = sum(self.blocked.values())
+        kinds = ", ".join(f"{k}={v}" for k, v in self.blocked.most_common())
+        return f"blocked {total} requests ({kinds or 'none'}), ~{self.bytes_saved / 1024:.0f} KB saved, {self.allowed} allowed"
+
+
+# ---------- Policy ----------
+def _policy_for(category: str | None):
+    allow = RESOURCE_ALLOWLIST.get((category or "").lower(), {})
+    types = set(BLOCK_RESOURCE_TYPES) - set(allow.get("types", []))
+    allow_re = re.compile("|".join(allow["patterns"])) if allow.get("patterns") else None
+    return types, allow_re
+
+
+def should_block(resource_type: str, url: str, blocked_types: set, allow_re=None) -> bool:
+    if allow_re and allow_re.search(url):
+        return False
+    if resource_type in blocked_types:
+        return True
+    return bool(_BLOCK_URL_RE and _BLOCK_URL_RE.search(url))
+
+
+# ---------- Route installation ----------
+async def install_resource_blocking(page, category: str | None = None) -> BlockStats:
+    """
+    Abort heavy and tracking requests on `page` before navigation.
+    Returns a BlockStats that fills in as the page loads.
+    """
+    blocked_types, allow_re = _policy_for(category)
+    stats = BlockStats()
+
+    async def handle(route):
+        request = route.request
+        try:
+            if should_block(request.resource_type, request.url, blocked_types, allow_re):
+                stats.record_block(request.resource_type)
+                await route.abort()
+            else:
+                stats.allowed += 1
+                await route.continue_()
+        except Exception:
+            pass  # page closed while the request was in flight
+
+    await page.route("**/*", handle)
+    return stats
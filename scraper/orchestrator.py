@@ -0,0 +1,77 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+from config.settings import SEARCH_URL, SCRAPE_CONCURRENCY, CATEGORY_TIMEOUT, DOMAIN_CONCURRENCY
+from database.mongo_handler import BulkProductWriter, product_collection
+from scraper.amazon_scraper import scrape_amazon
+from scraper.circuit_breaker import CircuitOpen
+
+# ---------- Per-domain politeness ----------
+_domain_semaphores: dict[str, asyncio.Semaphore] = {}
+_domain_loop = None
+
+
+def _domain_semaphore(host: str) -> asyncio.Semaphore:
+    """Process-wide cap on simultaneous scrapes against one host."""
+    global _domain_loop
+    loop = asyncio.get_running_loop()
+    if _domain_loop is not loop:
+        _domain_semaphores.clear()
+        _domain_loop = loop
+    if host not in _domain_semaphores:
+        _domain_semaphores[host] = asyncio.Semaphore(DOMAIN_CONCURRENCY)
+    return _domain_semaphores[host]
+
+
+# ---------- Orchestrator ----------
+async def scrape_categories(categories: dict, concurrency=SCRAPE_CONCURRENCY,
+                            timeout=CATEGORY_TIMEOUT, **scrape_kwargs) -> dict:
+    """
+    Scrape several categories concurrently.
+
+    `categories` maps query -> collection name. At most `concurrency`
+    categories run at once (and at most DOMAIN_CONCURRENCY per host); each
+    one is cancelled after `timeout` seconds. All categories share one
+    BulkProductWriter. Returns one result dict per query with status
+    (success | timeout | failed | deferred), scraped count, error, duration
+    and, for categories deferred by an open circuit, retry_at.
+    """
+    host = urlparse(SEARCH_URL).netloc
+    worker_slots = asyncio.Semaphore(max(1, concurrency))
+    own_writer = "writer" not in scrape_kwargs
+    writer = scrape_kwargs.pop("writer", None) or BulkProductWriter()
+
+    async def run_one(query, collection_name):
+        result = {"query": query, "collection": product_collection(collection_name), "status": "success",
+                  "scraped": 0, "error": None, "duration": 0.0, "retry_at": None}
+        async with worker_slots, _domain_semaphore(host):
+            started = time.monotonic()
+            try:
+                result["scraped"] = await asyncio.wait_for(
+                    scrape_amazon(query=query, collection_name=collection_name, writer=writer, **scrape_kwargs),
+                    timeout=timeout,
+                )
+            except CircuitOpen as e:
+                result["status"] = "deferred"
+                result["error"] = str(e)
+                result["retry_at"] = e.retry_at
+            except asyncio.TimeoutError:
+                result["status"] = "timeout"
+                result["error"] = f"Timed out after {timeout}s"
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = str(e)
+            result["duration"] = round(time.monotonic() - started, 2)
+
+        icon = {"success": "✅", "deferred": "⏸️"}.get(result["status"], "❌")
+        print(f"{icon} [{query}] {result['status']} | scraped={result['scraped']} | {result['duration']}s")
+        return result
+
+    try:
+        results = await asyncio.gather(*(run_one(q, c) for q, c in categories.items()))
+    finally:
+        if own_writer:
+            totals = await writer.aclose()
+            print(f"💾 Run totals | new={totals['new']} changed={totals['changed']} "
+                  f"unchanged={totals['unchanged']} membership={totals['membership']} failed={totals['failed']}")
+    return {r["query"]: r for r in results}
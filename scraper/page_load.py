@@ -0,0 +1,70 @@
+import asyncio
+import time
+from config.settings import READY_TIMEOUT
+from scraper.browser_pool import browser_pool
+from scraper.identities import identity_pool
+from scraper.rate_limiter import rate_limiter, THROTTLE_STATUSES
+from scraper.readiness import Readiness, wait_ready, capture_debug
+from utils.timing import timed, count
+
+# One navigation through the scraper's politeness stack: the identity's circuit,
+# a rate-limit slot, goto, HTTP throttle detection and the readiness race. The
+# outcome is fed back to the identity pool here, so every caller scores the
+# identity and releases a half-open probe the same way.
+
+
+# ---------- Load ----------
+async def load_page(page, url: str, ready_selectors: list[str], timeout: float = READY_TIMEOUT,
+                    wait_until: str = "load", phases: tuple[str, str] = ("navigation", "selector_wait")) -> Readiness:
+    """
+    Navigate `page` to `url` and wait until it is ready, blocked or timed out.
+    A throttling HTTP status comes back as state "throttled" without waiting.
+    Raises CircuitOpen (before any request) while the identity's circuit is open.
+    """
+    identity = browser_pool.identity(page)
+    identity_pool.check(identity, url)   # may take the circuit's half-open probe slot
+    outcome, started = None, None
+    try:
+        await rate_limiter.acquire(url)
+        started = time.monotonic()   # the identity's latency is the load, not the wait for a rate-limit slot
+        with timed(phases[0]):
+            response = await page.goto(url, timeout=60000, wait_until=wait_until)
+        if response is not None and response.status in THROTTLE_STATUSES:
+            outcome = "blocked"
+            rate_limiter.report_throttled(url)
+            return Readiness("throttled", f"HTTP {response.status}", time.monotonic() - started)
+        with timed(phases[1]):
+            readiness = await wait_ready(page, ready_selectors, timeout=timeout)
+        outcome = readiness.state
+        return readiness
+    except asyncio.CancelledError:
+        started = None   # a cancelled load says nothing about the identity
+        raise
+    finally:
+        if started is None:
+            identity_pool.release(identity, url)   # no verdict, but give back a probe slot check() took
+        else:
+            identity_pool.record(identity, url, outcome, time.monotonic() - started)
+
+
+async def load_results_page(page, url: str, ready_selectors: list[str], debug_name: str,
+                            timeout: float = READY_TIMEOUT, wait_until: str = "load") -> str:
+    """
+    load_page() for a search results page: returns the card selector that
+    matched, or raises when Amazon throttled or blocked us or the results
+    never appeared (so callers and the result cache never see an empty success).
+    """
+    readiness = await load_page(page, url, ready_selectors, timeout, wait_until)
+    if readiness.ready:
+        rate_limiter.report_success(url)
+        return readiness.match
+    if readiness.state == "throttled":
+        raise Exception(f"Amazon throttled the scraper ({readiness.match}).")
+
+    await capture_debug(page, debug_name)
+    if readiness.state == "blocked":
+        rate_limiter.report_throttled(url)
+        count("captcha_hits")
+        print(f"🚫 Amazon blocked the scraper (CAPTCHA or Bot detection: {readiness.match!r}).")
+        raise Exception("Amazon blocked the scraper (CAPTCHA).")
+    raise Exception(f"Product list selector not found after {readiness.elapsed:.0f}s.")
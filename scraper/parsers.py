@@ -0,0 +1,188 @@
+import re
+import sys
+import time
+from dataclasses import dataclass, asdict
+from selectolax.lexbor import LexborHTMLParser
+from scraper.utils import parse_price, parse_rating, parse_review_count, absolute_url, guess_brand, parse_byline_brand
+
+# ---------- Field specs ----------
+# Each field lists fallback selectors tried in order inside a result card.
+# `attr` reads an attribute instead of innerText; `pattern` makes a selector
+# count only when its text matches (so the next fallback is tried otherwise).
+SEARCH_CARD_FIELDS = {
+    "title": {"selectors": ["h2 span"]},
+    "price": {"selectors": ["span.a-price > span.a-offscreen"]},
+    "rating": {"selectors": ["span.a-icon-alt"]},
+    "reviews": {"selectors": ["span.a-size-base.s-underline-text"]},
+    "image_url": {"selectors": ["img.s-image"], "attr": "src"},
+    "product_url": {"selectors": ["h2 a"], "attr": "href"},
+}
+
+# Result-card selectors, tried in order until one matches
+CARD_SELECTORS = [
+    "div.s-main-slot div[data-component-type='s-search-result']",
+    "div[data-asin][data-component-type='s-search-result']",
+]
+
+# Enabled "Next" link of the SERP pagination strip (disabled on the last page)
+NEXT_PAGE_SELECTOR = "a.s-pagination-next"
+
+
+# ---------- Typed record ----------
+@dataclass
+class ProductRecord:
+    asin: str
+    title: str
+    price: float | None = None
+    rating: float | None = None
+    reviews: int = 0
+    image_url: str | None = None
+    product_url: str | None = None
+    brand: str = "Unknown"
+
+    def as_doc(self) -> dict:
+        return asdict(self)
+
+
+def build_record(raw: dict) -> ProductRecord | None:
+    """Turn a raw card record (text/attribute values) into a typed product, or None if unusable."""
+    asin = raw.get("asin")
+    title = (raw.get("title") or "").strip()
+    if not asin or not title:
+        return None
+    return ProductRecord(
+        asin=asin,
+        title=title,
+        price=parse_price(raw.get("price")),
+        rating=parse_rating(raw.get("rating")),
+        reviews=parse_review_count(raw.get("reviews")) or 0,
+        image_url=raw.get("image_url"),
+        product_url=absolute_url(raw.get("product_url")),
+        brand=guess_brand(title),
+    )
+
+
+# ---------- HTML → raw records ----------
+def _field_value(card, spec: dict) -> str | None:
+    pattern = re.compile(spec["pattern"]) if spec.get("pattern") else None
+    for selector in spec["selectors"]:
+        el = card.css_first(selector)
+        if el is None:
+            continue
+        value = el.attributes.get(spec["attr"]) if spec.get("attr") else el.text(deep=True)
+        if value is None:
+            continue
+        if pattern and not pattern.search(value):
+            continue
+        return value
+    return None
+
+
+def parse_cards(html: str, fields: dict = SEARCH_CARD_FIELDS,
+                card_selectors: list[str] = CARD_SELECTORS) -> list[dict]:
+    """
+    Offline twin of extractors.extract_cards: same field specs and fallback
+    semantics, evaluated against a saved HTML string instead of a live DOM.
+    """
+    tree = LexborHTMLParser(html)
+    for selector in card_selectors:
+        cards = tree.css(selector)
+        if cards:
+            break
+    else:
+        return []
+
+    records = []
+    for card in cards:
+        record = {"asin": card.attributes.get("data-asin")}
+        for name, spec in fields.items():
+            record[name] = _field_value(card, spec)
+        records.append(record)
+    return records
+
+
+def parse_next_page(html: str) -> str | None:
+    """Relative href of the next results page, or None on the last page."""
+    link = LexborHTMLParser(html).css_first(NEXT_PAGE_SELECTOR)
+    return link.attributes.get("href") if link is not None else None
+
+
+def parse_search_results(html: str) -> list[ProductRecord]:
+    """Parse a saved SERP page into typed product records (unusable cards are dropped)."""
+    return [r for r in map(build_record, parse_cards(html)) if r is not None]
+
+
+# ---------- Product detail page (/dp/{asin}) ----------
+DETAIL_FIELDS = {
+    "brand": {"selectors": ["tr.po-brand td.a-span9 span", "#bylineInfo"]},
+    "availability": {"selectors": ["#availability span", "#availability"]},
+    "seller": {"selectors": ["#sellerProfileTriggerId", "#merchant-info a span",
+                             "#merchantInfoFeature_feature_div .offer-display-feature-text-message"]},
+    "rating": {"selectors": ["#acrPopover"], "attr": "title"},
+    "reviews": {"selectors": ["#acrCustomerReviewText"]},
+    "price": {"selectors": ["#corePrice_feature_div span.a-offscreen", "span.a-price span.a-offscreen"]},
+}
+DETAIL_FEATURES_SELECTOR = "#feature-bullets li span.a-list-item"
+DETAIL_HISTOGRAM_SELECTORS = ["#histogramTable tr", "#histogramTable li"]
+DETAIL_READY_SELECTOR = "#productTitle"
+
+_STARS = re.compile(r"([1-5])\s*star", re.I)
+_PERCENT = re.compile(r"(\d{1,3})\s*(?:%|percent)", re.I)
+
+
+def _squash(value: str | None) -> str | None:
+    return " ".join(value.split()) or None if value else None
+
+
+def _rating_breakdown(tree) -> dict[str, int]:
+    """{"5": 63, "4": 20, ...}: percent of ratings per star, from the histogram rows or their aria-labels."""
+    for selector in DETAIL_HISTOGRAM_SELECTORS:
+        rows = tree.css(selector)
+        if rows:
+            break
+    else:
+        return {}
+    breakdown = {}
+    for row in rows:
+        link = row.css_first("a[aria-label]")
+        text = " ".join(filter(None, [row.text(deep=True), link.attributes.get("aria-label") if link else None]))
+        stars, percent = _STARS.search(text), _PERCENT.search(text)
+        if stars and percent:
+            breakdown.setdefault(stars.group(1), int(percent.group(1)))
+    return breakdown
+
+
+def parse_detail_html(html: str) -> dict | None:
+    """
+    Detail-page fields for enrichment: brand, availability, seller, bullet
+    features, rating / reviews / price and the star breakdown. None when the
+    page isn't a product page (CAPTCHA, dog page, ...).
+    """
+    tree = LexborHTMLParser(html)
+    if tree.css_first(DETAIL_READY_SELECTOR) is None:
+        return None
+    raw = {name: _field_value(tree.body or tree.root, spec) for name, spec in DETAIL_FIELDS.items()}
+    features = [_squash(el.text(deep=True)) for el in tree.css(DETAIL_FEATURES_SELECTOR)]
+    return {
+        "brand": parse_byline_brand(raw["brand"]),
+        "availability": _squash(raw["availability"]),
+        "seller": _squash(raw["seller"]),
+        "features": [f for f in features if f],
+        "rating": parse_rating(raw["rating"]),
+        "reviews": parse_review_count(raw["reviews"]),
+        "price": parse_price(raw["price"]),
+        "rating_breakdown": _rating_breakdown(tree),
+    }
+
+
+# ---------- CLI: parse saved pages ----------
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        started = time.perf_counter()
+        products = parse_search_results(html)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"📄 {path}: {len(products)} products in {elapsed_ms:.2f} ms")
+        for p in products:
+            print(f"   {p.asin} | {p.title[:60]} | ₹{p.price if p.price else 'N/A'} | ⭐{p.rating} | Reviews: {p.reviews}")
@@ -0,0 +1,100 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlparse
+from utils.timing import record
+from config.settings import (
+    RATE_LIMIT_PER_HOST,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MIN,
+    RATE_LIMIT_MAX,
+    RATE_LIMIT_JITTER,
+    RATE_LIMIT_RECOVERY_STREAK,
+)
+
+# Response codes that mean "slow down"
+THROTTLE_STATUSES = {429, 503}
+
+
+# ---------- Token Bucket ----------
+class _Bucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.streak = 0
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+# ---------- Host Rate Limiter ----------
+class HostRateLimiter:
+    """
+    Shared per-host token bucket for page requests.
+
+    acquire() waits for a token plus random jitter. Throttling signals
+    (CAPTCHA, 429/503) halve the host's rate and drain its bucket;
+    `recovery_streak` successes in a row raise it again by 25%.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_PER_HOST, burst=RATE_LIMIT_BURST, min_rate=RATE_LIMIT_MIN,
+                 max_rate=RATE_LIMIT_MAX, jitter=RATE_LIMIT_JITTER, recovery_streak=RATE_LIMIT_RECOVERY_STREAK):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.jitter = jitter
+        self.recovery_streak = recovery_streak
+        self._buckets: dict[str, _Bucket] = {}
+        self._loop = None
+
+    def _bucket(self, url_or_host: str) -> _Bucket:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio locks can't cross event loops (e.g. successive asyncio.run calls)
+            self._loop = loop
+            self._buckets = {}
+        host = urlparse(url_or_host).netloc or url_or_host
+        if host not in self._buckets:
+            self._buckets[host] = _Bucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    async def acquire(self, url: str) -> float:
+        """Wait until a request to `url`'s host is allowed. Returns seconds waited."""
+        bucket = self._bucket(url)
+        async with bucket.lock:
+            bucket.refill()
+            wait = 0.0 if bucket.tokens >= 1 else (1 - bucket.tokens) / bucket.rate
+            wait += random.uniform(0, self.jitter)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            record("rate_limit_wait", wait)
+            bucket.refill()
+            bucket.tokens -= 1
+        return wait
+
+    def report_success(self, url: str):
+        bucket = self._bucket(url)
+        bucket.streak += 1
+        if bucket.streak >= self.recovery_streak and bucket.rate < self.max_rate:
+            bucket.rate = min(self.max_rate, bucket.rate * 1.25)
+            bucket.streak = 0
+
+    def report_throttled(self, url: str):
+        bucket = self._bucket(url)
+        bucket.streak = 0
+        bucket.rate = max(self.min_rate, bucket.rate / 2)
+        bucket.tokens = min(bucket.tokens, 0)
+        print(f"🐢 Throttled by {urlparse(url).netloc or url}: slowing to {bucket.rate:.3f} req/s")
+
+    def snapshot(self) -> dict:
+        return {host: {"rate": round(b.rate, 3), "tokens": round(b.tokens, 2)} for host, b in self._buckets.items()}
+
+
+# Shared limiter used by every scrape in this process
+rate_limiter = HostRateLimiter()
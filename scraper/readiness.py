@@ -0,0 +1,80 @@
+import os
+import re
+import time
+from dataclasses import dataclass
+from playwright.async_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+from config.settings import READY_TIMEOUT, DEBUG_CAPTURE, DEBUG_CAPTURE_DIR
+from utils.timing import count
+
+# Markers of Amazon's bot check / CAPTCHA interstitial
+BLOCK_SELECTORS = ["form[action*='validateCaptcha']", "#captchacharacters"]
+BLOCK_TEXT = ["enter the characters you see below", "not a robot", "automated access to amazon"]
+
+# Re-evaluated on every DOM mutation, so it resolves as soon as either side appears.
+# Ready selectors win over block markers when both are present.
+_READY_JS = """([ready, blocked, texts]) => {
+    for (const s of ready) if (document.querySelector(s)) return {state: 'ready', match: s};
+    for (const s of blocked) if (document.querySelector(s)) return {state: 'blocked', match: s};
+    const text = document.body ? document.body.innerText.slice(0, 3000).toLowerCase() : '';
+    for (const t of texts) if (text.includes(t)) return {state: 'blocked', match: t};
+    return null;
+}"""
+
+
+@dataclass
+class Readiness:
+    state: str            # "ready" | "blocked" | "timeout" (| "throttled" from page_load.load_page)
+    match: str | None     # the selector / marker that decided it
+    elapsed: float
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+
+async def wait_ready(page, ready_selectors: list[str], timeout: float = READY_TIMEOUT,
+                     block_selectors: list[str] = BLOCK_SELECTORS, block_text: list[str] = BLOCK_TEXT) -> Readiness:
+    """
+    Race every ready selector against the block markers in one in-page wait.
+    Healthy pages return on the first matching selector; a CAPTCHA returns as
+    soon as it renders instead of after a chain of selector timeouts.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            handle = await page.wait_for_function(
+                _READY_JS, arg=[ready_selectors, block_selectors, block_text],
+                polling="mutation", timeout=remaining * 1000,
+            )
+            result = await handle.json_value()
+            outcome = Readiness(result["state"], result["match"], time.monotonic() - started)
+            count(f"page_{outcome.state}")
+            return outcome
+        except PlaywrightTimeoutError:
+            break
+        except PlaywrightError as e:
+            # A redirect replaced the document mid-wait; start over on the new one
+            if "context was destroyed" not in str(e) and "navigation" not in str(e).lower():
+                raise
+    count("page_timeout")
+    return Readiness("timeout", None, time.monotonic() - started)
+
+
+async def capture_debug(page, name: str):
+    """Screenshot + HTML of a page that wasn't ready, only when DEBUG_CAPTURE is on."""
+    if not DEBUG_CAPTURE:
+        return
+    os.makedirs(DEBUG_CAPTURE_DIR, exist_ok=True)
+    safe_name = re.sub(r"\W+", "_", name)
+    base = os.path.join(DEBUG_CAPTURE_DIR, f"debug_{safe_name}_{int(time.time())}")
+    try:
+        await page.screenshot(path=f"{base}.png")
+        with open(f"{base}.html", "w", encoding="utf-8") as f:
+            f.write(await page.content())
+        print(f"📸 Debug capture saved to {base}.png / .html")
+    except Exception as e:
+        print(f"⚠️ Debug capture failed: {e}")
@@ -0,0 +1,101 @@
+# scraper/result_cache.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from config.settings import SCRAPE_CACHE_TTL, SCRAPE_CACHE_MAX_ENTRIES
+from utils.timing import count
+
+
+class ResultCache:
+    """
+    TTL cache of finished scrapes plus single-flight coalescing: concurrent
+    calls for the same key share one in-flight scrape instead of each
+    launching their own. Failures are never cached.
+    """
+
+    def __init__(self, name: str, ttl: float = SCRAPE_CACHE_TTL, max_entries: int = SCRAPE_CACHE_MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (stored_at, value), oldest first
+        self._inflight = {}             # key -> asyncio.Task
+        self._loop = None
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def _bind_loop(self):
+        # In-flight tasks belong to one event loop; finished results don't
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._inflight = {}
+
+    def _fresh(self, key, max_age: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        if age > self.ttl:
+            del self._entries[key]
+            return None
+        return entry if age <= max_age else None
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _stat(self, name: str):
+        self.stats[name] += 1
+        count(f"scrape_cache_{name}")
+
+    async def get_or_run(self, key, factory, max_age: float = 0):
+        """
+        Return (value, info). A cached result at most `max_age` seconds old is
+        returned as-is; otherwise join the in-flight scrape for `key` or start
+        one with `factory()`. info = {"hit", "coalesced", "age"}.
+        """
+        self._bind_loop()
+        entry = self._fresh(key, max_age)
+        if entry is not None:
+            self._stat("hits")
+            return entry[1], {"hit": True, "coalesced": False, "age": round(time.monotonic() - entry[0], 1)}
+
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self._stat("coalesced")
+        else:
+            self._stat("misses")
+            task = asyncio.create_task(self._run(key, factory))
+            self._inflight[key] = task
+
+        # shield: one caller disconnecting must not cancel the scrape the others wait on
+        value = await asyncio.shield(task)
+        return value, {"hit": False, "coalesced": coalesced, "age": 0.0}
+
+    async def _run(self, key, factory):
+        try:
+            value = await factory()
+        except Exception:
+            self._stat("errors")
+            raise
+        else:
+            self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "hit_ratio": round((self.stats["hits"] + self.stats["coalesced"]) / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "ttl": self.ttl,
+        }
+
+    def clear(self):
+        self._entries.clear()
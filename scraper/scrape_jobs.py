@@ -0,0 +1,132 @@
+# scraper/scrape_jobs.py
+
+import asyncio
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from config.settings import JOB_API_CONCURRENCY, JOB_API_RETENTION, SSE_KEEPALIVE
+
+
+class ScrapeJob:
+    """One submitted scrape: status, products found so far and an append-only event log."""
+
+    def __init__(self, query: str, max_products: int | None):
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.max_products = max_products
+        self.status = "queued"   # queued -> running -> done | failed
+        self.products = []
+        self.scraped = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def _emit(self, event: str, data: dict):
+        self.events.append((event, data))
+        # Wake every stream waiting on the old event; later waiters get a fresh one
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def add_product(self, doc: dict):
+        product = {k: v for k, v in doc.items() if k != "_id"}
+        self.products.append(product)
+        self._emit("product", {"index": len(self.products), "product": product})
+
+    def as_dict(self, include_products: bool = True) -> dict:
+        result = {
+            "job_id": self.id,
+            "query": self.query,
+            "status": self.status,
+            "progress": len(self.products),
+            "max_products": self.max_products,
+            "scraped": self.scraped,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_products:
+            result["products"] = self.products
+        return result
+
+
+class ScrapeJobRegistry:
+    """
+    In-process registry for submit/poll scrapes. submit() returns at once; the
+    scrape runs in a background task bounded by `concurrency`, and progress can
+    be polled with get() or streamed with sse().
+    """
+
+    def __init__(self, concurrency: int = JOB_API_CONCURRENCY, retention: int = JOB_API_RETENTION):
+        self.concurrency = concurrency
+        self.retention = retention
+        self._jobs = OrderedDict()
+        self._tasks = set()
+        self._slots = None
+        self._loop = None
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.concurrency)
+
+    def submit(self, query: str, max_products: int | None, run) -> ScrapeJob:
+        """`run(on_product)` must return the scrape coroutine; it is started in the background."""
+        self._bind_loop()
+        job = ScrapeJob(query, max_products)
+        self._jobs[job.id] = job
+        self._prune()
+        task = asyncio.create_task(self._execute(job, run))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _execute(self, job: ScrapeJob, run):
+        async with self._slots:
+            job.status = "running"
+            job.started_at = datetime.now()
+            job._emit("status", {"status": job.status})
+            try:
+                job.scraped = await run(job.add_product)
+                job.status = "done"
+                job._emit("done", {"status": job.status, "scraped": job.scraped})
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                job._emit("failed", {"status": job.status, "error": job.error})
+                print(f"❌ Scrape job {job.id} ({job.query}) failed: {e}")
+            finally:
+                job.finished_at = datetime.now()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(self._jobs) - self.retention)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> ScrapeJob | None:
+        return self._jobs.get(job_id)
+
+    async def sse(self, job: ScrapeJob):
+        """Server-Sent Events: replays the job's events so far, then follows it until it finishes."""
+        sent = 0
+        while True:
+            changed = job._changed
+            while sent < len(job.events):
+                event, data = job.events[sent]
+                sent += 1
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+            if job.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"   # stops proxies closing an idle stream
@@ -0,0 +1,239 @@
+# scraper/taxonomy.py
+
+import hashlib
+import json
+import re
+import time
+from collections import deque
+from config.settings import (
+    TAXONOMY,
+    TAXONOMY_SOURCE,
+    TAXONOMY_COLLECTION,
+    TAXONOMY_RELOAD_INTERVAL,
+    TAXONOMY_QUERY_WEIGHT,
+    TAXONOMY_MIN_SCORE,
+    TAXONOMY_MAX_TAGS,
+)
+from utils.timing import count
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str | None) -> str:
+    """Lowercased words joined by single spaces and padded with one on each side,
+    so a padded keyword can only match whole words ("top" never hits "laptop")."""
+    return " " + " ".join(WORD_RE.findall((text or "").lower())) + " "
+
+
+# ---------- Aho-Corasick ----------
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over normalised keywords: one pass over a text
+    finds every keyword in it, however many keywords there are.
+    """
+
+    def __init__(self, keywords: list[str]):
+        self.keywords = keywords
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for index, keyword in enumerate(keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (index,)
+
+        # Breadth-first so a state's failure link is final before its children use it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def find(self, text: str) -> set[int]:
+        """Indexes of the keywords occurring in an already normalised text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+# ---------- Compiled Taxonomy ----------
+class CompiledTaxonomy:
+    """A taxonomy compiled once: tags in priority order plus one automaton over all their keywords."""
+
+    def __init__(self, rules: dict, version: str | None = None):
+        self.tags = []
+        self.parents = {}
+        weights = {}   # normalised keyword -> [(tag index, weight)]
+        for tag, rule in rules.items():
+            tag = str(tag).strip().lower()
+            keywords = rule.get("keywords") or {}
+            if isinstance(keywords, (list, tuple)):
+                keywords = {k: 1.0 for k in keywords}
+            if not tag or not keywords:
+                print(f"⚠️ Skipping taxonomy rule without a tag or keywords: {tag!r}")
+                continue
+            index = len(self.tags)
+            self.tags.append(tag)
+            self.parents[tag] = [p.lower() for p in rule.get("parents", [])]
+            scale = float(rule.get("weight", 1.0))
+            for keyword, weight in keywords.items():
+                padded = normalize(keyword)
+                if padded.strip():
+                    weights.setdefault(padded, []).append((index, float(weight) * scale))
+        self.keywords = list(weights)
+        self.weights = [weights[k] for k in self.keywords]
+        self.automaton = KeywordAutomaton(self.keywords)
+        self.version = version or fingerprint(rules)
+
+    def scores(self, title: str | None, query: str | None = None, base: list[float] | None = None) -> dict[str, float]:
+        """Tag -> score. `base` is a precomputed query_scores() to add instead of rescanning `query`."""
+        totals = list(base) if base is not None else self.query_scores(query)
+        self._add(totals, title, 1.0)
+        return {self.tags[i]: s for i, s in enumerate(totals) if s}
+
+    def query_scores(self, query: str | None) -> list[float]:
+        totals = [0.0] * len(self.tags)
+        self._add(totals, query, TAXONOMY_QUERY_WEIGHT)
+        return totals
+
+    def _add(self, totals: list[float], text: str | None, scale: float):
+        if not text:
+            return
+        for hit in self.automaton.find(normalize(text)):
+            for index, weight in self.weights[hit]:
+                totals[index] += weight * scale
+
+    def classify(self, title: str | None, query: str | None = None, base: list[float] | None = None,
+                 min_score: float = TAXONOMY_MIN_SCORE, max_tags: int = TAXONOMY_MAX_TAGS) -> list[str]:
+        """Best-scoring tags (ties keep taxonomy order), each followed by its parents."""
+        scores = self.scores(title, query, base)
+        ranked = sorted((t for t, s in scores.items() if s >= min_score), key=lambda t: -scores[t])
+        labels = []
+        for tag in ranked[:max_tags]:
+            for label in (tag, *self.parents[tag]):
+                if label not in labels:
+                    labels.append(label)
+        return labels
+
+
+def fingerprint(rules: dict) -> str:
+    return hashlib.sha1(json.dumps(rules, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+# ---------- Classifier ----------
+class TagClassifier:
+    """
+    Process-wide tag classifier. The taxonomy comes from TAXONOMY in
+    config/settings.py or, with TAXONOMY_SOURCE = "mongo", from one document
+    per tag ({"tag", "parents", "keywords", "weight", "priority", "enabled"}) in
+    TAXONOMY_COLLECTION. reload() compiles a new taxonomy and swaps it in
+    whole, so classification never sees a half-built one.
+    """
+
+    def __init__(self, rules: dict = TAXONOMY, source: str = TAXONOMY_SOURCE,
+                 reload_interval: float = TAXONOMY_RELOAD_INTERVAL):
+        self.source = source
+        self.reload_interval = reload_interval
+        self._compiled = CompiledTaxonomy(rules)
+        self._loaded_from = "config"
+        self._checked_at = None if source == "mongo" else time.monotonic()
+
+    def classify(self, title: str | None, query: str | None = None) -> list[str]:
+        """Tags for one product; the lowercased query when no tag scores high enough."""
+        count("products_classified")
+        labels = self._compiled.classify(title, query)
+        return labels or ([query.lower()] if query else [])
+
+    def classify_many(self, titles: list[str | None], query: str | None = None) -> list[list[str]]:
+        """classify() for a batch of titles against one compiled taxonomy (a reload mid-batch can't split it)."""
+        compiled = self._compiled
+        count("products_classified", len(titles))
+        base = compiled.query_scores(query)   # the shared query is scanned once, not per title
+        fallback = [query.lower()] if query else []
+        return [compiled.classify(title, base=base) or list(fallback) for title in titles]
+
+    def load(self, rules: dict, origin: str = "config") -> bool:
+        """Compile `rules` and swap them in. False (and no swap) when they're unchanged."""
+        version = fingerprint(rules)
+        if version == self._compiled.version:
+            return False
+        started = time.perf_counter()
+        compiled = CompiledTaxonomy(rules, version)
+        self._compiled = compiled
+        self._loaded_from = origin
+        count("taxonomy_reloads")
+        print(f"🏷️ Taxonomy {version} loaded from {origin}: {len(compiled.tags)} tags, "
+              f"{len(compiled.keywords)} keywords, {len(compiled.automaton)} states "
+              f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return True
+
+    async def reload(self) -> bool:
+        """Re-read the taxonomy from its source now. Returns True when it changed."""
+        self._checked_at = time.monotonic()
+        if self.source != "mongo":
+            return self.load(TAXONOMY)
+        try:
+            rules = await load_mongo_taxonomy()
+        except Exception as e:
+            print(f"⚠️ Taxonomy reload failed, keeping {self._compiled.version}: {e}")
+            return False
+        if not rules:
+            print(f"⚠️ '{TAXONOMY_COLLECTION}' has no taxonomy rules, keeping {self._compiled.version}")
+            return False
+        return self.load(rules, origin="mongo")
+
+    async def refresh(self) -> bool:
+        """reload() when the Mongo taxonomy hasn't been checked for reload_interval seconds."""
+        if self.source != "mongo":
+            return False
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.reload_interval:
+            return False
+        return await self.reload()
+
+    def snapshot(self) -> dict:
+        compiled = self._compiled
+        return {
+            "version": compiled.version,
+            "source": self._loaded_from,
+            "tags": {tag: compiled.parents[tag] for tag in compiled.tags},
+            "keywords": len(compiled.keywords),
+            "states": len(compiled.automaton),
+        }
+
+
+async def load_mongo_taxonomy() -> dict:
+    from database.async_mongo import find   # the classifier itself works without a database
+    rules = {}
+    for doc in await find(TAXONOMY_COLLECTION, {"enabled": {"$ne": False}}, {"_id": 0},
+                          sort=[("priority", 1), ("tag", 1)]):
+        tag = doc.pop("tag", None)
+        doc.pop("priority", None)
+        if tag:
+            rules[tag] = doc
+    return rules
+
+
+tag_classifier = TagClassifier()
@@ -0,0 +1,50 @@
+import re
+
+AMAZON_BASE_URL = "https://www.amazon.in"
+
+# ---------- Text → value helpers ----------
+def parse_price(text: str | None) -> float | None:
+    """'₹1,299.00' -> 1299.0 (None when missing or unparsable)."""
+    if not text:
+        return None
+    try:
+        return float(text.replace("₹", "").replace(",", "").strip())
+    except ValueError:
+        return None
+
+def parse_rating(text: str | None) -> float | None:
+    """'4.3 out of 5 stars' -> 4.3"""
+    m = re.search(r"[\d.]+", text or "")
+    try:
+        return float(m.group(0)) if m else None
+    except ValueError:
+        return None
+
+def parse_review_count(text: str | None) -> int | None:
+    """'(12,345)' -> 12345"""
+    m = re.search(r"[\d,]+", text or "")
+    try:
+        return int(m.group(0).replace(",", "")) if m else None
+    except ValueError:
+        return None
+
+def absolute_url(href: str | None) -> str | None:
+    """Make a relative Amazon link absolute and drop its tracking query string."""
+    if not href:
+        return None
+    if href.startswith("http"):
+        return href
+    return AMAZON_BASE_URL + href.split("?")[0]
+
+def guess_brand(title: str | None) -> str:
+    """Fallback brand: the first word of the title."""
+    words = (title or "").split()
+    return words[0] if words else "Unknown"
+
+def parse_byline_brand(text: str | None) -> str | None:
+    """'Visit the Samsung Store' / 'Brand: Samsung' -> 'Samsung'"""
+    text = " ".join((text or "").split())
+    m = re.fullmatch(r"(?:Visit the (.+?) Store|Brand:\s*(.+))", text, re.I)
+    if m:
+        text = m.group(1) or m.group(2)
+    return text or None
@@ -0,0 +1,79 @@
+# tests/test_change_detection.py
+"""Content hashing and the write plan diff_products builds against stored state."""
+from database.mongo_handler import build_product_doc, content_hash, diff_products
+
+SCRAPED = {
+    "asin": "B0TEST0001",
+    "title": "Test Phone 5G (128GB)",
+    "price": 12999,
+    "rating": 4.2,
+    "reviews": 1520,
+    "image_url": "https://m.media-amazon.com/images/I/test.jpg",
+    "product_url": "https://www.amazon.in/dp/B0TEST0001",
+    "tags": ["mobile"],
+    "brand": "Test",
+    "category": "mobile",
+    "rank": 1,
+}
+
+
+def doc(**changes) -> dict:
+    return build_product_doc({**SCRAPED, **changes})
+
+
+def stored(d: dict) -> dict:
+    """What stored_state() would return after `d` was written."""
+    return {d["asin"]: {k: d[k] for k in ("asin", "content_hash", "categories", "ranks", "category_tags", "tags")}}
+
+
+def test_hash_tracks_product_fields_only():
+    base = doc()
+    assert content_hash(base) == content_hash(doc(scraped_at="later"))
+    assert content_hash(base) == content_hash(doc(rank=7))   # membership is not a product change
+    assert content_hash(base) != content_hash(doc(price=11999))
+    assert content_hash(base) != content_hash(doc(title="Test Phone 5G (256GB)"))
+
+
+def test_new_product_is_upserted():
+    ops, counts = diff_products([doc()], {})
+    assert counts == {"new": 1, "changed": 0, "unchanged": 0, "membership": 0}
+    (op,) = ops
+    assert op._upsert
+    assert op._doc["$set"]["price"] == 12999
+    assert op._doc["$set"]["ranks.mobile"] == 1
+    assert op._doc["$addToSet"] == {"categories": {"$each": ["mobile"]}}
+
+
+def test_unchanged_product_is_skipped():
+    ops, counts = diff_products([doc()], stored(doc()))
+    assert ops == []
+    assert counts["unchanged"] == 1
+
+
+def test_changed_product_gets_full_set():
+    ops, counts = diff_products([doc(price=11999)], stored(doc()))
+    assert counts["changed"] == 1
+    assert ops[0]._doc["$set"]["price"] == 11999
+    assert "last_updated" in ops[0]._doc["$set"]
+
+
+def test_rank_move_is_a_membership_write():
+    ops, counts = diff_products([doc(rank=3)], stored(doc()))
+    assert counts == {"new": 0, "changed": 0, "unchanged": 1, "membership": 1}
+    (op,) = ops
+    assert not op._upsert
+    assert set(op._doc["$set"]) == {"ranks.mobile", "last_updated"}
+
+
+def test_new_category_is_added_without_product_fields():
+    laptop = doc(category="laptop", tags=["mobile"])
+    ops, counts = diff_products([laptop], stored(doc()))
+    assert counts["membership"] == 1
+    update = ops[0]._doc
+    assert update["$addToSet"] == {"categories": {"$each": ["laptop"]}}
+    assert "price" not in update["$set"]
+
+
+def test_found_without_rank_drops_stored_rank():
+    ops, _ = diff_products([doc(rank=None)], stored(doc()))
+    assert ops[0]._doc["$unset"] == {"ranks.mobile": ""}
@@ -0,0 +1,104 @@
+# tests/test_circuit_breaker.py
+"""Circuit breaker state transitions, on a fake clock."""
+import pytest
+from scraper import circuit_breaker as breaker_module
+from scraper.circuit_breaker import CircuitBreaker, CircuitOpen
+
+URL = "https://www.amazon.in/s?k=mobile"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(breaker_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(threshold=2, base_backoff=10, max_backoff=40)
+
+
+def state(breaker) -> dict:
+    (circuit,) = breaker.snapshot()
+    return circuit
+
+
+def trip(breaker):
+    breaker.record_block(URL)
+    breaker.record_block(URL)
+
+
+def test_opens_after_threshold_blocks(breaker):
+    breaker.record_block(URL)
+    breaker.check(URL)   # one block is below the threshold
+    breaker.record_block(URL)
+    assert state(breaker)["state"] == "open"
+    with pytest.raises(CircuitOpen) as e:
+        breaker.check(URL)
+    assert e.value.retry_in == pytest.approx(10)
+
+
+def test_success_resets_the_block_count(breaker):
+    breaker.record_block(URL)
+    breaker.record_success(URL)
+    breaker.record_block(URL)
+    assert state(breaker)["state"] == "closed"
+
+
+def test_one_probe_after_backoff_then_closes(breaker, clock):
+    trip(breaker)
+    clock.now += 10
+    breaker.check(URL)   # the probe
+    assert state(breaker)["state"] == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.check(URL)   # only one probe at a time
+    breaker.record(URL, "ready")
+    assert state(breaker)["state"] == "closed"
+    breaker.check(URL)
+
+
+def test_blocked_probe_doubles_backoff_up_to_max(breaker, clock):
+    trip(breaker)
+    for backoff in (20, 40, 40):
+        clock.now += 100
+        breaker.check(URL)
+        breaker.record(URL, "blocked")
+        assert state(breaker)["state"] == "open"
+        assert state(breaker)["backoff"] == backoff
+
+
+def test_inconclusive_probe_reopens_with_same_backoff(breaker, clock):
+    trip(breaker)
+    clock.now += 10
+    breaker.check(URL)
+    breaker.record(URL, "timeout")
+    assert state(breaker)["state"] == "open"
+    assert state(breaker)["backoff"] == 10
+
+
+def test_cancelled_probe_releases_the_slot(breaker, clock):
+    trip(breaker)
+    clock.now += 10
+    breaker.check(URL)
+    with pytest.raises(CircuitOpen):
+        breaker.precheck(URL)   # probe in flight
+    breaker.release(URL)
+    breaker.precheck(URL)
+    breaker.check(URL)   # the next request becomes the probe instead of waiting forever
+    assert state(breaker)["state"] == "half_open"
+
+
+def test_circuits_are_per_identity(breaker):
+    trip(breaker)
+    breaker.check(URL, identity="other")
+    with pytest.raises(CircuitOpen):
+        breaker.precheck(URL)
@@ -0,0 +1,46 @@
+# tests/test_parsers.py
+"""Offline parser checks against the recorded SERP pages in fixtures/serp."""
+import os
+import pytest
+from scraper.parsers import parse_cards, parse_next_page, parse_search_results
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures", "serp")
+RESULT_PAGES = ["mobile_p1", "mobile_p2", "laptop_p1"]
+
+
+def load(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, f"{name}.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("page", RESULT_PAGES)
+def test_results_page_has_eight_products(page):
+    assert len(parse_search_results(load(page))) == 8
+
+
+@pytest.mark.parametrize("page", RESULT_PAGES)
+def test_missing_price_and_rating_are_none(page):
+    products = parse_search_results(load(page))
+    assert any(p.price is None for p in products)
+    assert any(p.rating is None for p in products)
+    # a missing value stays None rather than turning into 0
+    assert all(p.price is None or p.price > 0 for p in products)
+    assert all(p.rating is None or 0 < p.rating <= 5 for p in products)
+
+
+@pytest.mark.parametrize("page", RESULT_PAGES)
+def test_product_urls_are_absolute(page):
+    for product in parse_search_results(load(page)):
+        assert product.product_url.startswith("https://www.amazon.in/")
+
+
+def test_captcha_page_has_no_cards():
+    html = load("captcha")
+    assert parse_cards(html) == []
+    assert parse_search_results(html) == []
+    assert parse_next_page(html) is None
+
+
+def test_next_page_link():
+    assert parse_next_page(load("mobile_p1")).startswith("/s?k=mobile&page=2")
+    assert parse_next_page(load("mobile_p2")) is None
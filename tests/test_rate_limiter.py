@@ -0,0 +1,108 @@
+# tests/test_rate_limiter.py
+"""Token-bucket refill and throttling back-off of the host rate limiter."""
+import asyncio
+import pytest
+from scraper import rate_limiter as limiter_module
+from scraper.rate_limiter import HostRateLimiter
+
+URL = "https://www.amazon.in/s?k=mobile"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def limiter(**kwargs) -> HostRateLimiter:
+    return HostRateLimiter(**{"rate": 1.0, "burst": 2, "min_rate": 0.1, "max_rate": 2.0, "jitter": 0,
+                              "recovery_streak": 3, **kwargs})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record asyncio.sleep calls instead of waiting."""
+    calls = []
+
+    async def fake_sleep(seconds):
+        calls.append(seconds)
+
+    monkeypatch.setattr(limiter_module.asyncio, "sleep", fake_sleep)
+    return calls
+
+
+def test_burst_then_wait(sleeps):
+    async def main():
+        rl = limiter()
+        return [await rl.acquire(URL) for _ in range(3)]
+
+    first, second, third = run(main())
+    assert first == second == 0   # the banked burst goes out at once
+    assert third == pytest.approx(1.0, abs=0.05)
+    assert len(sleeps) == 1
+
+
+def test_refill_is_capped_at_burst():
+    async def main():
+        rl = limiter()
+        bucket = rl._bucket(URL)
+        bucket.tokens = 0
+        bucket.updated -= 1.5
+        bucket.refill()
+        refilled = bucket.tokens
+        bucket.updated -= 100
+        bucket.refill()
+        return refilled, bucket.tokens
+
+    refilled, capped = run(main())
+    assert refilled == pytest.approx(1.5, abs=0.05)
+    assert capped == 2
+
+
+def test_throttle_halves_rate_and_drains_bucket():
+    async def main():
+        rl = limiter()
+        rl.report_throttled(URL)
+        first = dict(rl.snapshot()["www.amazon.in"])
+        for _ in range(10):
+            rl.report_throttled(URL)
+        return first, rl.snapshot()["www.amazon.in"]
+
+    first, floored = run(main())
+    assert first == {"rate": 0.5, "tokens": 0}
+    assert floored["rate"] == 0.1
+
+
+def test_success_streak_recovers_rate():
+    async def main():
+        rl = limiter()
+        rl.report_throttled(URL)
+        rates = []
+        for _ in range(6):
+            rl.report_success(URL)
+            rates.append(rl.snapshot()["www.amazon.in"]["rate"])
+        return rates
+
+    assert run(main()) == [0.5, 0.5, 0.625, 0.625, 0.625, 0.781]
+
+
+def test_throttle_breaks_the_streak():
+    async def main():
+        rl = limiter()
+        rl.report_success(URL)
+        rl.report_success(URL)
+        rl.report_throttled(URL)
+        rl.report_success(URL)
+        return rl.snapshot()["www.amazon.in"]["rate"]
+
+    assert run(main()) == 0.5
+
+
+def test_hosts_have_separate_buckets():
+    async def main():
+        rl = limiter()
+        rl.report_throttled(URL)
+        rl._bucket("https://example.com/")
+        return rl.snapshot()
+
+    snapshot = run(main())
+    assert snapshot["www.amazon.in"]["rate"] == 0.5
+    assert snapshot["example.com"]["rate"] == 1.0
@@ -0,0 +1,61 @@
+# tests/test_taxonomy.py
+"""Aho-Corasick keyword matching and taxonomy scoring."""
+from scraper.taxonomy import CompiledTaxonomy, KeywordAutomaton, normalize
+
+RULES = {
+    "mobile": {"keywords": {"smartphone": 1.0, "5g": 0.5, "phone": 1.0}, "parents": ["electronics"]},
+    "laptop": {"keywords": ["laptop", "notebook"], "parents": ["electronics"]},
+    "case": {"keywords": ["phone case", "back cover"], "parents": ["accessories"]},
+}
+
+
+def found(keywords: list[str], text: str) -> set[str]:
+    automaton = KeywordAutomaton(keywords)
+    return {keywords[i] for i in automaton.find(text)}
+
+
+def test_finds_overlapping_keywords():
+    # the textbook set: "she" ends inside "hers", "he" inside both
+    assert found(["he", "she", "his", "hers"], "ushers") == {"he", "she", "hers"}
+
+
+def test_failure_links_continue_after_partial_match():
+    assert found(["abcd", "bce"], "abce") == {"bce"}
+    assert found(["abcd", "bce"], "xabcdx") == {"abcd"}
+
+
+def test_no_match():
+    assert found(["laptop"], " gaming mouse ") == set()
+
+
+def test_padded_keywords_match_whole_words_only():
+    keywords = [normalize("top"), normalize("laptop")]
+    assert found(keywords, normalize("Gaming Laptop, 16GB")) == {normalize("laptop")}
+    assert found(keywords, normalize("Tank-top for men")) == {normalize("top")}
+
+
+def test_normalize_drops_punctuation_and_case():
+    assert normalize("  Phone-Case (Black)!") == " phone case black "
+    assert normalize(None) == "  "
+
+
+def test_classify_scores_and_adds_parents():
+    taxonomy = CompiledTaxonomy(RULES)
+    assert taxonomy.classify("Acme Smartphone 5G", min_score=1.0, max_tags=3) == ["mobile", "electronics"]
+    assert taxonomy.classify("Acme 5G", min_score=1.0, max_tags=3) == []   # 0.5 is below the bar
+
+
+def test_multi_word_keywords_and_ranking():
+    taxonomy = CompiledTaxonomy(RULES)
+    scores = taxonomy.scores("Silicone phone case and back cover")
+    assert scores == {"mobile": 1.0, "case": 2.0}
+    assert taxonomy.classify("Silicone phone case and back cover", min_score=1.0, max_tags=1) == ["case", "accessories"]
+
+
+def test_query_hits_are_weighted():
+    taxonomy = CompiledTaxonomy(RULES)
+    plain = taxonomy.scores("Acme 15 inch")
+    boosted = taxonomy.scores("Acme 15 inch", query="laptop")
+    assert plain == {}
+    assert boosted["laptop"] > 1.0
+    assert taxonomy.scores("Acme 15 inch", base=taxonomy.query_scores("laptop")) == boosted
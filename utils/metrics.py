@@ -0,0 +1,53 @@
+# utils/metrics.py
+
+from contextlib import nullcontext
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from config.settings import TRACING_ENABLED
+
+try:  # OpenTelemetry is optional; spans are no-ops without it
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+# ---------- Prometheus metrics ----------
+PHASE_SECONDS = Histogram(
+    "scraper_phase_seconds",
+    "Wall time per scrape phase",
+    ["phase"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+EVENT_COUNTERS = {
+    "products_scraped": Counter("scraper_products_scraped_total", "Products extracted and queued for storage"),
+    "products_skipped": Counter("scraper_products_skipped_total", "Result cards dropped (no ASIN or title)"),
+    "products_failed": Counter("scraper_products_failed_total", "Products that raised while being stored"),
+    "captcha_hits": Counter("scraper_captcha_hits_total", "Result pages answered with a CAPTCHA / bot check"),
+    "browser_launches": Counter("scraper_browser_launches_total", "Chromium instances launched by the pool"),
+}
+OTHER_EVENTS = Counter("scraper_events_total", "Other scraper events", ["event"])
+
+
+def observe_phase(phase: str, seconds: float):
+    PHASE_SECONDS.labels(phase=phase).observe(seconds)
+
+
+def inc(event: str, n: int = 1):
+    counter = EVENT_COUNTERS.get(event)
+    if counter is not None:
+        counter.inc(n)
+    else:
+        OTHER_EVENTS.labels(event=event).inc(n)
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    """Body and content type for a /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# ---------- Tracing ----------
+_tracer = trace.get_tracer("scraper") if (trace and TRACING_ENABLED) else None
+
+
+def span(name: str):
+    """OpenTelemetry span when tracing is enabled and installed, otherwise a no-op."""
+    return _tracer.start_as_current_span(name) if _tracer else nullcontext()
@@ -0,0 +1,74 @@
+# utils/timing.py
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from utils import metrics
+
+# In-process samples of per-phase durations and event counters.
+# Every sample is also exported to Prometheus (utils/metrics.py);
+# benchmarks read the raw samples back.
+_lock = threading.Lock()
+_durations = defaultdict(list)
+_counters = defaultdict(int)
+MAX_SAMPLES = 10_000   # per phase; oldest samples are dropped first
+
+
+def record(phase: str, seconds: float):
+    """Store one duration sample for `phase`."""
+    metrics.observe_phase(phase, seconds)
+    with _lock:
+        samples = _durations[phase]
+        samples.append(seconds)
+        if len(samples) > MAX_SAMPLES:
+            del samples[: len(samples) - MAX_SAMPLES]
+
+
+@contextmanager
+def timed(phase: str):
+    """Time the wrapped block as one sample (and span) of `phase`, even if it raises."""
+    started = time.perf_counter()
+    try:
+        with metrics.span(phase):
+            yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+def count(event: str, n: int = 1):
+    metrics.inc(event, n)
+    with _lock:
+        _counters[event] += n
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no samples)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary() -> dict:
+    """Per-phase count / p50 / p95 / max (seconds) plus counters."""
+    with _lock:
+        durations = {k: list(v) for k, v in _durations.items()}
+        counters = dict(_counters)
+    phases = {
+        phase: {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": max(values),
+        }
+        for phase, values in durations.items() if values
+    }
+    return {"phases": phases, "counters": counters}
+
+
+def reset():
+    with _lock:
+        _durations.clear()
+        _counters.clear()
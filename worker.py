@@ -0,0 +1,134 @@
+# worker.py
+"""
+Drains the Mongo job queue. Run as many of these as you like, on any host
+that can reach MONGO_URI:
+
+    python worker.py --concurrency 2
+"""
+import argparse
+import asyncio
+import os
+import socket
+import main
+from config.settings import QUEUE_COLLECTION, QUEUE_VISIBILITY_TIMEOUT, QUEUE_POLL_INTERVAL, WORKER_CONCURRENCY
+from database import job_queue
+from database.async_mongo import close_connection
+from database.schedule_store import schedule_collection
+from scraper.browser_pool import browser_pool
+
+
+# ---------- Job Handlers ----------
+async def handle_schedule(job):
+    schedule = await schedule_collection().find_one({"_id": job["payload"]["schedule_id"]})
+    if schedule is None:
+        return {"skipped": "schedule deleted"}
+    return await main.run_scrape(schedule, job_id=job["_id"], categories=job["payload"].get("categories"))
+
+
+async def schedule_gave_up(job, error: str):
+    # A crash on the last attempt never reached run_scrape's cleanup; release the
+    # schedule (if this job still holds it) or it stays is_running forever
+    if await main.set_schedule_status(job["payload"]["schedule_id"], is_running=False, status="failed",
+                                      job_id=job["_id"]):
+        print(f"🔓 Released schedule {job['payload']['schedule_id']} after job {job['_id']} gave up")
+    await main.send_failure_email(error, job["payload"].get("frequency"))
+
+
+# kind -> (handler, called once when the job runs out of attempts)
+HANDLERS = {
+    "schedule": (handle_schedule, schedule_gave_up),
+}
+
+
+# ---------- Worker ----------
+LEASE_BACKOFF_MAX = 60   # seconds between lease attempts while Mongo keeps failing
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def _heartbeat(job_id, worker_id: str):
+    while True:
+        await asyncio.sleep(QUEUE_VISIBILITY_TIMEOUT / 3)
+        if not await job_queue.heartbeat(job_id, worker_id):
+            print(f"⚠️ Lost the lease on job {job_id}; another worker may pick it up.")
+            return
+
+
+async def process_job(job, worker_id: str):
+    job_id = job["_id"]
+    handler, gave_up = HANDLERS.get(job["kind"], (None, None))
+    beat = asyncio.create_task(_heartbeat(job_id, worker_id))
+    try:
+        if job["attempts"] > job["max_attempts"]:
+            raise RuntimeError("lease expired on the final attempt")
+        if handler is None:
+            raise ValueError(f"no handler for job kind '{job['kind']}'")
+        result = await handler(job)
+    except job_queue.JobDeferred as e:
+        await job_queue.defer(job_id, worker_id, e)
+        print(f"⏸️ Job {job_id} deferred until {e.retry_at:%H:%M:%S}: {e}")
+    except Exception as e:
+        status = await job_queue.fail(job_id, worker_id, str(e))
+        print(f"❌ Job {job_id} failed (attempt {job['attempts']}/{job['max_attempts']}): {e} → {status}")
+        if status == "failed" and gave_up:
+            await gave_up(job, str(e))
+    else:
+        await job_queue.complete(job_id, worker_id, result)
+        print(f"✔️ Job {job_id} done")
+    finally:
+        beat.cancel()
+
+
+async def run_worker(worker_id: str | None = None, concurrency: int = WORKER_CONCURRENCY,
+                     stop: asyncio.Event | None = None):
+    """Lease and run jobs until `stop` is set. Jobs in flight when the process dies are retried after their lease expires."""
+    worker_id = worker_id or default_worker_id()
+    await job_queue.ensure_queue_indexes()
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+
+    def finished(task):
+        running.discard(task)
+        slots.release()
+
+    print(f"👷 Worker {worker_id} draining '{QUEUE_COLLECTION}' ({concurrency} at a time)")
+    backoff = QUEUE_POLL_INTERVAL
+    try:
+        while stop is None or not stop.is_set():
+            await slots.acquire()
+            try:
+                job = await job_queue.lease(worker_id)
+            except Exception as e:
+                # Mongo unreachable: keep the worker (and an embedding scheduler) alive and retry
+                slots.release()
+                print(f"❌ Leasing a job failed: {e}; retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, LEASE_BACKOFF_MAX)
+                continue
+            backoff = QUEUE_POLL_INTERVAL
+            if job is None:
+                slots.release()
+                await asyncio.sleep(QUEUE_POLL_INTERVAL)
+                continue
+            print(f"📦 Leased job {job['_id']} ({job['kind']}, attempt {job['attempts']}/{job['max_attempts']})")
+            task = asyncio.create_task(process_job(job, worker_id))
+            running.add(task)
+            task.add_done_callback(finished)
+    finally:
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+async def _main(args):
+    try:
+        await run_worker(args.id, args.concurrency)
+    finally:
+        await browser_pool.close()
+        await close_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape job queue worker")
+    parser.add_argument("--id", help="worker id (default: host:pid)")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY)
+    asyncio.run(_main(parser.parse_args()))